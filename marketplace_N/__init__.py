@@ -1,4 +1,5 @@
 from .money import Money
+from .idempotency import IdempotencyStore
 
 # ===== Catalog =====
 from .catalog.products import (
@@ -12,28 +13,57 @@ from .catalog.products import (
 from .catalog.factories import (
     IValidator,
     IIndexMapper,
+    SimpleIndexMapper,
+    ElectronicsIndexMapper,
+    ClothingIndexMapper,
+    BookIndexMapper,
     ICategoryFamilyFactory,
+    BaseFamilyFactory,
     ElectronicsFamilyFactory,
     ClothingFamilyFactory,
     BookFamilyFactory,
 )
 
+from .catalog.validators import (
+    FieldRule,
+    RuleValidator,
+)
+from .catalog.batch import ProductBatch
 from .catalog.registry import CategoryRegistry
 from .catalog.tree import (
     CategoryComponent,
     CategoryLeaf,
     CategoryComposite,
 )
+from .catalog.tree_index import CategoryTreeIndex
 
 # ===== Listings =====
 from .listings.dto import ListingDTO
 from .listings.models import Listing
+from .listings.cache import (
+    CacheStats,
+    LRUCache,
+)
+from .listings.index import ListingIndex
 from .listings.repository import (
     IListingRepository,
+    IListingQueries,
     ListingRepository,
     ListingRepositoryCacheProxy,
 )
-from .listings.service import ListingService
+from .listings.file_repository import FileListingRepository
+from .listings.sqlite_repository import SqliteListingRepository
+from .listings.service import (
+    BulkCreateResult,
+    ListingService,
+)
+
+# ===== Search =====
+from .search.index import (
+    SearchHit,
+    SearchResult,
+    SearchIndex,
+)
 
 # ===== Orders =====
 from .orders.models import (
@@ -42,14 +72,32 @@ from .orders.models import (
     OrderStatus,
 )
 from .orders.states import (
+    OrderStateError,
+    InvalidTransitionError,
     OrderState,
     CreatedState,
     PaidState,
     ReservedState,
     ShippedState,
+    DeliveredState,
     CancelledState,
+    BulkTransitionResult,
+    bulk_transition,
 )
 from .orders.context import OrderContext
+from .orders.history import (
+    Transition,
+    TransitionLog,
+    OrderStatusIndex,
+    OrderHistory,
+)
+from .orders.stock import (
+    StockError,
+    InsufficientStockError,
+    ReservationExpiredError,
+    Reservation,
+    StockLedger,
+)
 from .orders.handlers import (
     OrderHandler,
     CartValidationHandler,
@@ -57,13 +105,26 @@ from .orders.handlers import (
     PaymentValidationHandler,
     FraudCheckHandler,
 )
+from .orders.pipeline import (
+    StageResult,
+    PipelineResult,
+    ValidationPipeline,
+    release_reservation,
+    default_validation_pipeline,
+)
 from .orders.commands import (
     CommandResult,
     ICommand,
     PlaceOrderCommand,
     CapturePaymentCommand,
+    CommandBusMetrics,
     CommandBus,
 )
+from .orders.journal import (
+    CommandRecord,
+    JournalState,
+    CommandJournal,
+)
 
 # ===== Payments =====
 from .payments.gateways import (
@@ -95,11 +156,42 @@ from .events.bus import (
     AnalyticsHandler,
     EventBus,
 )
+from .events.analytics import BatchingAnalyticsHandler
+from .events.journal import (
+    FsyncPolicy,
+    EventJournal,
+    JournalConsumer,
+)
+from .events.async_bus import (
+    BackpressurePolicy,
+    HandlerMetrics,
+    AsyncEventBus,
+)
 
 # ===== Pricing =====
 from .pricing.calculators import (
     IPriceCalculator,
     BasePriceCalculator,
     PromotionDecorator,
-    TaxDecorator
+    TaxDecorator,
+    LoyaltyDecorator,
+    CurrencyDecorator,
+)
+from .pricing.quote_cache import CachingPriceCalculator
+from .pricing.promotions import (
+    PromotionRule,
+    PromotionEngine,
+    PromotionRulesDecorator,
+)
+from .pricing.batch import (
+    PricePipeline,
+    compile_pipeline,
+    calculate_batch,
+)
+from .pricing.fx import (
+    RateSnapshot,
+    IRateSource,
+    StaticRateSource,
+    FileRateSource,
+    CurrencyConverter,
 )
@@ -0,0 +1,97 @@
+from array import array
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, Optional, Sequence
+import uuid
+
+from catalog.products import AbstractProduct
+from money import Money
+
+# attributes rebuilt from the fixed columns rather than kept in the per-row extras
+_BASE_KEYS = ("title", "price", "currency")
+
+
+class ProductBatch:
+    def __init__(self, product_cls: type[AbstractProduct]):
+        self._cls = product_cls
+        self._ids = bytearray()
+        self._titles: list[str] = []
+        self._amounts: list[Decimal] = []
+        self._currencies: list[str] = []
+        self._columns: dict[str, Any] = {
+            f: array("q") if f in product_cls.INT_FIELDS else [] for f in product_cls.TYPED_FIELDS
+        }
+        # per rebuilt key, a flag per row for whether the product's attributes held exactly that
+        # value; absent keys stay absent and values that don't round-trip go to the extras
+        self._present: dict[str, bytearray] = {k: bytearray() for k in _BASE_KEYS + product_cls.TYPED_FIELDS}
+        # leftover attributes per row, None for the common case of having none
+        self._extras: list[Optional[dict[str, Any]]] = []
+
+    @classmethod
+    def from_products(cls, products: Iterable[AbstractProduct]) -> "ProductBatch":
+        products = list(products)
+        if not products:
+            raise ValueError("Cannot infer product type from an empty batch")
+        batch = cls(type(products[0]))
+        batch.extend(products)
+        return batch
+
+    def append(self, product: AbstractProduct) -> None:
+        if type(product) is not self._cls:
+            raise TypeError(f"Expected {self._cls.__name__}, got {type(product).__name__}")
+        self._ids += product.get_id().bytes
+        self._titles.append(product.get_title())
+        price = product.get_price()
+        self._amounts.append(price.amount)
+        self._currencies.append(price.currency)
+        rebuilt = {"title": product.get_title(), "price": str(price.amount), "currency": price.currency}
+        for f, col in self._columns.items():
+            rebuilt[f] = v = getattr(product, f)
+            col.append(v)
+        attrs = product.get_attributes()
+        for k, flags in self._present.items():
+            flags.append(k in attrs and attrs[k] == rebuilt[k])
+        extra = {k: v for k, v in attrs.items() if k not in rebuilt or v != rebuilt[k]}
+        self._extras.append(extra or None)
+
+    def extend(self, products: Iterable[AbstractProduct]) -> None:
+        for p in products:
+            self.append(p)
+
+    def get_product_type(self) -> type[AbstractProduct]:
+        return self._cls
+
+    def get_id(self, i: int) -> uuid.UUID:
+        return uuid.UUID(bytes=bytes(self._ids[i * 16:(i + 1) * 16]))
+
+    def column(self, name: str) -> Sequence[Any]:
+        if name == "id":
+            return [self.get_id(i) for i in range(len(self))]
+        if name == "title":
+            return self._titles
+        if name == "amount":
+            return self._amounts
+        if name == "currency":
+            return self._currencies
+        return self._columns[name]
+
+    def get(self, i: int) -> AbstractProduct:
+        attrs = dict(self._extras[i] or ())
+        present = self._present
+        for f, col in self._columns.items():
+            if present[f][i]:
+                attrs[f] = col[i]
+        if present["title"][i]:
+            attrs["title"] = self._titles[i]
+        if present["price"][i]:
+            attrs["price"] = str(self._amounts[i])
+        if present["currency"][i]:
+            attrs["currency"] = self._currencies[i]
+        price = Money(self._amounts[i], self._currencies[i])
+        return self._cls(self._titles[i], price, attrs, self.get_id(i))
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def __iter__(self) -> Iterator[AbstractProduct]:
+        for i in range(len(self)):
+            yield self.get(i)
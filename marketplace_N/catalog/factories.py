@@ -7,67 +7,113 @@ import uuid
 from datetime import datetime
 from money import Money
 from catalog.products import AbstractProduct, BookProduct, ClothingProduct, ElectronicProduct, ValidationError
+from catalog.validators import FieldRule, RuleValidator
 
 
 class IValidator(Protocol):
     def validate(self, attrs: dict[str, Any]) -> None: ...
+    def validate_many(self, batch: list[dict[str, Any]]) -> dict[int, ValidationError]: ...
 
 class IIndexMapper(Protocol):
     def map(self, product: AbstractProduct) -> dict[str, Any]: ...
 
 class ICategoryFamilyFactory(Protocol):
     def create_product(self, attrs: dict[str, Any]) -> AbstractProduct: ...
+    def create_products(self, batch: list[dict[str, Any]]) -> list[AbstractProduct | ValidationError]: ...
     def create_validator(self) -> IValidator: ...
     def create_index_mapper(self) -> IIndexMapper: ...
 
-class ElectronicsValidator:
-    def validate(self, attrs: dict[str, Any]) -> None:
-        if "brand" not in attrs:
-            raise ValidationError("Electronics must have a brand")
+# built once at import, every factory instance shares its category's validator
+ELECTRONICS_VALIDATOR = RuleValidator([
+    FieldRule("brand", required=True, types=(str,), message="Electronics must have a brand"),
+    FieldRule("model", types=(str,)),
+    FieldRule("warranty_months", types=(int, str), coerce=int, min=0, max=1200),
+])
+
+CLOTHING_VALIDATOR = RuleValidator([
+    FieldRule("size", required=True, types=(str, int), message="Clothing must have size"),
+    FieldRule("material", types=(str,)),
+    FieldRule("gender", types=(str,)),
+])
+
+BOOK_VALIDATOR = RuleValidator([
+    FieldRule("author", required=True, types=(str,), message="Book must have author"),
+    FieldRule("genre", types=(str,)),
+    FieldRule("publication_year", types=(int, str), coerce=int, min=0, max=9999),
+])
 
 class SimpleIndexMapper:
     def map(self, product: AbstractProduct) -> dict[str, Any]:
         return {"id": str(product.get_id()), "title": product.get_title()}
 
-class ElectronicsFamilyFactory:
-    def create_product(self, attrs: dict[str, Any]) -> ElectronicProduct:
-        v = self.create_validator()
-        v.validate(attrs)
-        money = Money(Decimal(attrs.get("price", "0.0")), attrs.get("currency", "USD"))
-        return ElectronicProduct(attrs.get("title", "Unnamed"), money, attrs)
+class ElectronicsIndexMapper(SimpleIndexMapper):
+    def map(self, product: ElectronicProduct) -> dict[str, Any]:
+        doc = super().map(product)
+        doc["brand"] = product.get_brand()
+        return doc
 
-    def create_validator(self) -> IValidator:
-        return ElectronicsValidator()
+class ClothingIndexMapper(SimpleIndexMapper):
+    def map(self, product: ClothingProduct) -> dict[str, Any]:
+        doc = super().map(product)
+        doc["size"] = product.get_size()
+        return doc
 
-    def create_index_mapper(self) -> IIndexMapper:
-        return SimpleIndexMapper()
+class BookIndexMapper(SimpleIndexMapper):
+    def map(self, product: BookProduct) -> dict[str, Any]:
+        doc = super().map(product)
+        doc["author"] = product.get_author()
+        doc["genre"] = product.get_genre()
+        return doc
+
+class BaseFamilyFactory:
+    product_cls: type[AbstractProduct]
+    validator: RuleValidator
+
+    def create_product(self, attrs: dict[str, Any]) -> AbstractProduct:
+        self.validator.validate(attrs)
+        return self._build(attrs)
 
-class ClothingFamilyFactory:
-    def create_product(self, attrs: dict[str, Any]) -> ClothingProduct:
-        money = Money(Decimal(attrs.get("price", "0.0")), attrs.get("currency", "USD"))
-        return ClothingProduct(attrs.get("title", "Unnamed"), money, attrs)
+    def create_products(self, batch: list[dict[str, Any]]) -> list[AbstractProduct | ValidationError]:
+        errors = self.validator.validate_many(batch)
+        out: list[AbstractProduct | ValidationError] = []
+        for i, attrs in enumerate(batch):
+            if i in errors:
+                out.append(errors[i])
+                continue
+            try:
+                out.append(self._build(attrs))
+            except ValidationError as e:
+                out.append(e)
+        return out
 
     def create_validator(self) -> IValidator:
-        class _V:
-            def validate(self, a: dict[str, Any]) -> None:
-                if "size" not in a:
-                    raise ValidationError("Clothing must have size")
-        return _V()
+        return self.validator
+
+    def _build(self, attrs: dict[str, Any]) -> AbstractProduct:
+        # anything the rules let through but the product can't take is still a validation error
+        try:
+            money = Money(Decimal(attrs.get("price", "0.0")), attrs.get("currency", "USD"))
+            return self.product_cls(attrs.get("title", "Unnamed"), money, attrs)
+        except (TypeError, ValueError, ArithmeticError) as e:
+            raise ValidationError(f"Invalid attributes: {e}") from e
+
+class ElectronicsFamilyFactory(BaseFamilyFactory):
+    product_cls = ElectronicProduct
+    validator = ELECTRONICS_VALIDATOR
 
     def create_index_mapper(self) -> IIndexMapper:
-        return SimpleIndexMapper()
+        return ElectronicsIndexMapper()
 
-class BookFamilyFactory:
-    def create_product(self, attrs: dict[str, Any]) -> BookProduct:
-        money = Money(Decimal(attrs.get("price", "0.0")), attrs.get("currency", "USD"))
-        return BookProduct(attrs.get("title", "Unnamed"), money, attrs)
+class ClothingFamilyFactory(BaseFamilyFactory):
+    product_cls = ClothingProduct
+    validator = CLOTHING_VALIDATOR
 
-    def create_validator(self) -> IValidator:
-        class _V:
-            def validate(self, a: dict[str, Any]) -> None:
-                if "author" not in a:
-                    raise ValidationError("Book must have author")
-        return _V()
+    def create_index_mapper(self) -> IIndexMapper:
+        return ClothingIndexMapper()
+
+class BookFamilyFactory(BaseFamilyFactory):
+    product_cls = BookProduct
+    validator = BOOK_VALIDATOR
 
     def create_index_mapper(self) -> IIndexMapper:
-        return SimpleIndexMapper()
\ No newline at end of file
+        return BookIndexMapper()
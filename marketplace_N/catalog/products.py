@@ -8,6 +8,11 @@ class ValidationError(Exception):
     pass
 
 class AbstractProduct(ABC):
+    __slots__ = ("_id", "_title", "_price", "_attributes")
+    # attribute keys exposed through typed getters, stored as columns by ProductBatch
+    TYPED_FIELDS: tuple[str, ...] = ()
+    INT_FIELDS: tuple[str, ...] = ()
+
     def __init__(self, title: str, price: Money, attributes: dict[str, Any], id: Optional[uuid.UUID]=None):
         self._id = id or uuid.uuid4()
         self._title = title
@@ -30,12 +35,21 @@ class AbstractProduct(ABC):
     def get_attributes(self) -> dict[str, Any]:
         return self._attributes
 
+# typed fields read through to the attributes dict instead of keeping a second reference per instance
+def _attribute(key: str) -> property:
+    return property(lambda self: self._attributes.get(key))
+
 class ElectronicProduct(AbstractProduct):
-    def __init__(self, title: str, price: Money, attributes: dict[str, Any]):
-        super().__init__(title, price, attributes)
-        self.warranty_months = int(attributes.get("warranty_months", 0))
-        self.brand = attributes.get("brand")
-        self.model = attributes.get("model")
+    __slots__ = ("warranty_months",)
+    TYPED_FIELDS = ("warranty_months", "brand", "model")
+    INT_FIELDS = ("warranty_months",)
+
+    brand = _attribute("brand")
+    model = _attribute("model")
+
+    def __init__(self, title: str, price: Money, attributes: dict[str, Any], id: Optional[uuid.UUID]=None):
+        super().__init__(title, price, attributes, id)
+        self.warranty_months = int(self._attributes.get("warranty_months", 0))
 
     def get_warranty_months(self) -> int:
         return self.warranty_months
@@ -47,11 +61,15 @@ class ElectronicProduct(AbstractProduct):
         return self.model
 
 class ClothingProduct(AbstractProduct):
-    def __init__(self, title: str, price: Money, attributes: dict[str, Any]):
-        super().__init__(title, price, attributes)
-        self.size = attributes.get("size")
-        self.material = attributes.get("material")
-        self.gender = attributes.get("gender")
+    __slots__ = ()
+    TYPED_FIELDS = ("size", "material", "gender")
+
+    size = _attribute("size")
+    material = _attribute("material")
+    gender = _attribute("gender")
+
+    def __init__(self, title: str, price: Money, attributes: dict[str, Any], id: Optional[uuid.UUID]=None):
+        super().__init__(title, price, attributes, id)
 
     def get_size(self) -> Optional[str]:
         return self.size
@@ -63,11 +81,15 @@ class ClothingProduct(AbstractProduct):
         return self.gender
 
 class BookProduct(AbstractProduct):
-    def __init__(self, title: str, price: Money, attributes: dict[str, Any]):
-        super().__init__(title, price, attributes)
-        self.author = attributes.get("author")
-        self.genre = attributes.get("genre")
-        self.publication_year = attributes.get("publication_year")
+    __slots__ = ()
+    TYPED_FIELDS = ("author", "genre", "publication_year")
+
+    author = _attribute("author")
+    genre = _attribute("genre")
+    publication_year = _attribute("publication_year")
+
+    def __init__(self, title: str, price: Money, attributes: dict[str, Any], id: Optional[uuid.UUID]=None):
+        super().__init__(title, price, attributes, id)
 
     def get_author(self) -> Optional[str]:
         return self.author
@@ -1,14 +1,48 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
 class CategoryComponent(ABC):
     def __init__(self, name: str):
         self._name = name
+        self._parent: Optional["CategoryComposite"] = None
+        # bumped on the root whenever anything below it changes, indexes compare against it
+        self._version = 0
 
     def get_name(self) -> str:
         return self._name
 
-    def get_children(self) -> list["CategoryComponent"]:
-        return []
+    def get_parent(self) -> Optional["CategoryComposite"]:
+        return self._parent
+
+    def get_root(self) -> "CategoryComponent":
+        node = self
+        while node._parent is not None:
+            node = node._parent
+        return node
+
+    def get_path(self, sep: str = "/") -> str:
+        names = []
+        node = self
+        while node is not None:
+            names.append(node._name)
+            node = node._parent
+        return sep.join(reversed(names))
+
+    def get_children(self) -> tuple["CategoryComponent", ...]:
+        return ()
+
+    def get_descendants(self) -> frozenset["CategoryComponent"]:
+        return frozenset()
+
+    def get_version(self) -> int:
+        return self._version
+
+    def _invalidate(self) -> None:
+        node = self
+        while node is not None:
+            node._descendants = None
+            node._version += 1
+            node = node._parent
 
 class CategoryLeaf(CategoryComponent):
     def __init__(self, name: str):
@@ -17,13 +51,42 @@ class CategoryLeaf(CategoryComponent):
 class CategoryComposite(CategoryComponent):
     def __init__(self, name: str):
         super().__init__(name)
-        self._children: list[CategoryComponent] = []
+        # dict as an ordered set: O(1) remove, insertion order kept
+        self._children: dict[CategoryComponent, None] = {}
+        self._children_view: Optional[tuple[CategoryComponent, ...]] = ()
+        self._descendants: Optional[frozenset[CategoryComponent]] = frozenset()
 
     def add(self, component: CategoryComponent) -> None:
-        self._children.append(component)
+        # adding self or an ancestor would close a parent cycle
+        node: Optional[CategoryComponent] = self
+        while node is not None:
+            if node is component:
+                raise ValueError(f"{component.get_name()} is {self._name} or one of its ancestors")
+            node = node._parent
+        if component._parent is not None:
+            component._parent.remove(component)
+        self._children[component] = None
+        component._parent = self
+        self._children_view = None
+        self._invalidate()
 
     def remove(self, component: CategoryComponent) -> None:
-        self._children.remove(component)
+        if component not in self._children:
+            raise ValueError(f"{component.get_name()} is not a child of {self._name}")
+        del self._children[component]
+        component._parent = None
+        self._children_view = None
+        self._invalidate()
+
+    def get_children(self) -> tuple[CategoryComponent, ...]:
+        if self._children_view is None:
+            self._children_view = tuple(self._children)
+        return self._children_view
 
-    def get_children(self) -> list[CategoryComponent]:
-        return list(self._children)
+    def get_descendants(self) -> frozenset[CategoryComponent]:
+        if self._descendants is None:
+            found = set(self._children)
+            for child in self._children:
+                found |= child.get_descendants()
+            self._descendants = frozenset(found)
+        return self._descendants
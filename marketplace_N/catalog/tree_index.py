@@ -0,0 +1,62 @@
+from typing import Optional
+
+from catalog.tree import CategoryComponent
+
+
+class CategoryTreeIndex:
+    def __init__(self, root: CategoryComponent, sep: str = "/"):
+        self._root = root
+        self._sep = sep
+        self._version = -1
+        self._by_path: dict[str, CategoryComponent] = {}
+        self._by_name: dict[str, list[CategoryComponent]] = {}
+        # Euler tour entry/exit times: B is under A iff tin[A] < tin[B] and tout[B] <= tout[A]
+        self._tin: dict[CategoryComponent, int] = {}
+        self._tout: dict[CategoryComponent, int] = {}
+
+    def find_by_path(self, path: str) -> Optional[CategoryComponent]:
+        self._ensure_fresh()
+        return self._by_path.get(path)
+
+    def find_by_name(self, name: str) -> list[CategoryComponent]:
+        self._ensure_fresh()
+        return list(self._by_name.get(name, ()))
+
+    def get_descendants(self, node: CategoryComponent) -> frozenset[CategoryComponent]:
+        return node.get_descendants()
+
+    def is_descendant(self, node: CategoryComponent, ancestor: CategoryComponent) -> bool:
+        self._ensure_fresh()
+        if node not in self._tin or ancestor not in self._tin:
+            return False
+        return self._tin[ancestor] < self._tin[node] and self._tout[node] <= self._tout[ancestor]
+
+    def __len__(self) -> int:
+        self._ensure_fresh()
+        return len(self._tin)
+
+    def _ensure_fresh(self) -> None:
+        if self._root.get_version() != self._version:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._by_path.clear()
+        self._by_name.clear()
+        self._tin.clear()
+        self._tout.clear()
+        clock = 0
+        # iterative DFS so deep trees don't hit the recursion limit
+        stack: list[tuple[CategoryComponent, str, bool]] = [(self._root, self._root.get_name(), False)]
+        while stack:
+            node, path, done = stack.pop()
+            if done:
+                self._tout[node] = clock
+                continue
+            clock += 1
+            self._tin[node] = clock
+            self._by_path[path] = node
+            self._by_name.setdefault(node.get_name(), []).append(node)
+            stack.append((node, path, True))
+            for child in reversed(node.get_children()):
+                stack.append((child, path + self._sep + child.get_name(), False))
+        self._version = self._root.get_version()
@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from catalog.products import ValidationError
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    key: str
+    required: bool = False
+    types: tuple[type, ...] = ()
+    # values are passed through coerce (e.g. int for "24") before the range check
+    coerce: Optional[Callable[[Any], Any]] = None
+    min: Optional[Any] = None
+    max: Optional[Any] = None
+    # raised when a required key is missing or None
+    message: Optional[str] = None
+
+class RuleValidator:
+    def __init__(self, rules: Iterable[FieldRule]):
+        self._rules = tuple(rules)
+        self._required = tuple((r.key, r.message or f"Missing required attribute '{r.key}'")
+                               for r in self._rules if r.required)
+        self._checks = tuple(self._compile(r) for r in self._rules if r.types or r.coerce or
+                             r.min is not None or r.max is not None)
+
+    def validate(self, attrs: dict[str, Any]) -> None:
+        for key, message in self._required:
+            if attrs.get(key) is None:
+                raise ValidationError(message)
+        for check in self._checks:
+            check(attrs)
+
+    def validate_many(self, batch: Iterable[dict[str, Any]]) -> dict[int, ValidationError]:
+        errors: dict[int, ValidationError] = {}
+        validate = self.validate
+        for i, attrs in enumerate(batch):
+            try:
+                validate(attrs)
+            except ValidationError as e:
+                errors[i] = e
+        return errors
+
+    def get_rules(self) -> tuple[FieldRule, ...]:
+        return self._rules
+
+    @staticmethod
+    def _compile(rule: FieldRule) -> Callable[[dict[str, Any]], None]:
+        # the closure binds only what this rule needs, so validate() is a flat loop of calls
+        key, types, coerce, lo, hi = rule.key, rule.types, rule.coerce, rule.min, rule.max
+
+        def check(attrs: dict[str, Any]) -> None:
+            value = attrs.get(key)
+            if value is None:
+                return
+            if types and not isinstance(value, types):
+                raise ValidationError(f"Attribute '{key}' has invalid type {type(value).__name__}")
+            if coerce is not None:
+                try:
+                    value = coerce(value)
+                except (TypeError, ValueError, ArithmeticError):
+                    raise ValidationError(f"Attribute '{key}' has invalid value {value!r}")
+            if (lo is not None and value < lo) or (hi is not None and value > hi):
+                raise ValidationError(f"Attribute '{key}' is out of range")
+        return check
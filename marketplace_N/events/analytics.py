@@ -0,0 +1,157 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Callable, Optional
+import heapq
+import os
+import struct
+import threading
+import time
+import uuid
+
+from events.bus import IEvent, OrderPlacedEvent
+
+# fixed-width row: order id, user id, amount in 1/10000 units, currency, unix timestamp
+_ROW = struct.Struct("<16s16sq3sd")
+_AMOUNT_SCALE = Decimal("10000")
+
+
+class BatchingAnalyticsHandler:
+    def __init__(self, directory: str, batch_size: int = 1000, max_delay: float = 1.0,
+                 segment_bytes: int = 64 << 20, window_minutes: int = 60,
+                 clock: Callable[[], float] = time.monotonic):
+        self._dir = directory
+        self._batch_size = batch_size
+        self._max_delay = max_delay
+        self._segment_bytes = segment_bytes
+        self._window_minutes = window_minutes
+        self._clock = clock
+        self._lock = threading.Lock()
+        # columnar buffer, one list per field
+        self._order_ids: list[bytes] = []
+        self._user_ids: list[bytes] = []
+        self._amounts: list[int] = []
+        self._currencies: list[bytes] = []
+        self._timestamps: list[float] = []
+        self._first_buffered: Optional[float] = None
+        # rolling aggregates, updated per event so reads never rescan segments
+        self._revenue: dict[str, Decimal] = defaultdict(Decimal)
+        # minute -> count, with a min-heap of minutes so the window can be trimmed from the oldest
+        self._per_minute: dict[int, int] = {}
+        self._minutes: list[int] = []
+        self._latest_minute: Optional[int] = None
+        self._segment = None
+        self.flushed_rows = 0
+        self.flushes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._segment_no = len([n for n in os.listdir(directory) if n.startswith("segment-")])
+        # the time-based flush must also fire once traffic stops
+        self._stop = threading.Event()
+        self._poller = threading.Thread(target=self._poll_loop, name="analytics-flush", daemon=True)
+        self._poller.start()
+
+    def handle(self, e: IEvent) -> None:
+        if not isinstance(e, OrderPlacedEvent):
+            return
+        with self._lock:
+            stamp = e.timestamp
+            # events carry naive utcnow() timestamps
+            ts = (stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)).timestamp()
+            self._order_ids.append(e.orderId.bytes)
+            self._user_ids.append(e.userId.bytes)
+            self._amounts.append(int((e.amount.amount * _AMOUNT_SCALE).to_integral_value()))
+            self._currencies.append(e.amount.currency.encode("ascii")[:3].ljust(3))
+            self._timestamps.append(ts)
+            self._revenue[e.amount.currency] += e.amount.amount
+            self._count_minute(int(ts // 60))
+            if self._first_buffered is None:
+                self._first_buffered = self._clock()
+            if (len(self._order_ids) >= self._batch_size
+                    or self._clock() - self._first_buffered >= self._max_delay):
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def poll(self) -> None:
+        # flushes if the oldest buffered event has waited max_delay
+        with self._lock:
+            if self._first_buffered is not None and self._clock() - self._first_buffered >= self._max_delay:
+                self._flush_locked()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._poller is not threading.current_thread():
+            self._poller.join()
+        with self._lock:
+            self._flush_locked()
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+    def get_revenue(self) -> dict[str, Decimal]:
+        with self._lock:
+            return dict(self._revenue)
+
+    def get_orders_per_minute(self) -> dict[datetime, int]:
+        with self._lock:
+            return {datetime.utcfromtimestamp(minute * 60): self._per_minute[minute]
+                    for minute in sorted(self._per_minute)}
+
+    def get_buffered(self) -> int:
+        return len(self._order_ids)
+
+    def _poll_loop(self) -> None:
+        while not self._stop.wait(self._max_delay / 2):
+            self.poll()
+
+    def _count_minute(self, minute: int) -> None:
+        # late events (stamped before publish, or racing for the lock) join their minute's bucket
+        if self._latest_minute is None or minute > self._latest_minute:
+            self._latest_minute = minute
+        cutoff = self._latest_minute - self._window_minutes
+        if minute <= cutoff:
+            return
+        count = self._per_minute.get(minute)
+        if count is None:
+            heapq.heappush(self._minutes, minute)
+            count = 0
+        self._per_minute[minute] = count + 1
+        while self._minutes and self._minutes[0] <= cutoff:
+            del self._per_minute[heapq.heappop(self._minutes)]
+
+    def _flush_locked(self) -> None:
+        if not self._order_ids:
+            return
+        pack = _ROW.pack
+        data = b"".join(pack(*row) for row in zip(self._order_ids, self._user_ids, self._amounts,
+                                                  self._currencies, self._timestamps))
+        segment = self._open_segment()
+        segment.write(data)
+        segment.flush()
+        self.flushed_rows += len(self._order_ids)
+        self.flushes += 1
+        self._order_ids.clear()
+        self._user_ids.clear()
+        self._amounts.clear()
+        self._currencies.clear()
+        self._timestamps.clear()
+        self._first_buffered = None
+
+    def _open_segment(self):
+        if self._segment is not None and self._segment.tell() >= self._segment_bytes:
+            self._segment.close()
+            self._segment = None
+            self._segment_no += 1
+        if self._segment is None:
+            path = os.path.join(self._dir, f"segment-{self._segment_no:08d}.bin")
+            self._segment = open(path, "ab")
+        return self._segment
+
+def read_segment(path: str) -> list[tuple]:
+    with open(path, "rb") as f:
+        data = f.read()
+    return [(uuid.UUID(bytes=oid), uuid.UUID(bytes=uid), Decimal(amount) / _AMOUNT_SCALE,
+             cur.decode("ascii").strip(), datetime.utcfromtimestamp(ts))
+            for oid, uid, amount, cur, ts in _ROW.iter_unpack(data)]
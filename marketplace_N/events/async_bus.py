@@ -0,0 +1,215 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Optional
+import logging
+import pickle
+import tempfile
+import threading
+import time
+
+from events.bus import EventBus, IEvent, IEventHandler
+from events.journal import EventJournal
+
+logger = logging.getLogger(__name__)
+
+class BackpressurePolicy(Enum):
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    SPILL = "spill"
+
+class HandlerMetrics:
+    def __init__(self):
+        self.handled = 0
+        self.errors = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.queue_depth = 0
+        self.last_error: Optional[BaseException] = None
+
+    def record(self, latency: float) -> None:
+        self.handled += 1
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+
+    def get_mean_latency(self) -> float:
+        return self.total_latency / self.handled if self.handled else 0.0
+
+    def __repr__(self) -> str:
+        return (f"HandlerMetrics(handled={self.handled}, errors={self.errors}, dropped={self.dropped}, "
+                f"spilled={self.spilled}, queue_depth={self.queue_depth}, last_error={self.last_error!r}, "
+                f"mean_latency={self.get_mean_latency():.6f}, max_latency={self.max_latency:.6f})")
+
+class _SpillFile:
+    # FIFO of pickled events on disk, used once a handler's in-memory queue is full
+    def __init__(self):
+        self._f = tempfile.TemporaryFile()
+        self._read_pos = 0
+        self._count = 0
+
+    def push(self, e: IEvent) -> None:
+        self._f.seek(0, 2)
+        pickle.dump(e, self._f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._count += 1
+
+    def pop(self) -> IEvent:
+        self._f.seek(self._read_pos)
+        e = pickle.load(self._f)
+        self._read_pos = self._f.tell()
+        self._count -= 1
+        if self._count == 0:
+            self._f.seek(0)
+            self._f.truncate()
+            self._read_pos = 0
+        return e
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+class _HandlerQueue:
+    def __init__(self, handler: IEventHandler, capacity: int, policy: BackpressurePolicy,
+                 block_timeout: Optional[float]):
+        self.handler = handler
+        self.metrics = HandlerMetrics()
+        self._capacity = capacity
+        self._policy = policy
+        self._block_timeout = block_timeout
+        self._items: deque[IEvent] = deque()
+        self._spill: Optional[_SpillFile] = _SpillFile() if policy is BackpressurePolicy.SPILL else None
+        self._cond = threading.Condition()
+        # True while a drain task for this handler is queued or running, keeps per-handler order
+        self._scheduled = False
+
+    def offer(self, e: IEvent) -> bool:
+        # returns True when the caller has to schedule a drain task
+        with self._cond:
+            if self._spill is not None and (self._spill or len(self._items) >= self._capacity):
+                self._spill.push(e)
+                self.metrics.spilled += 1
+            else:
+                if len(self._items) >= self._capacity:
+                    if self._policy is BackpressurePolicy.DROP_OLDEST:
+                        self._items.popleft()
+                        self.metrics.dropped += 1
+                    elif not self._cond.wait_for(lambda: len(self._items) < self._capacity,
+                                                 self._block_timeout):
+                        self.metrics.dropped += 1
+                        return False
+                self._items.append(e)
+            self.metrics.queue_depth = self._depth()
+            if self._scheduled:
+                return False
+            self._scheduled = True
+            return True
+
+    def drain(self, max_batch: int) -> bool:
+        # returns True if events remain and the task should be resubmitted
+        for _ in range(max_batch):
+            with self._cond:
+                if not self._items and self._spill:
+                    while self._spill and len(self._items) < self._capacity:
+                        self._items.append(self._spill.pop())
+                if not self._items:
+                    self._scheduled = False
+                    self.metrics.queue_depth = 0
+                    self._cond.notify_all()
+                    return False
+                e = self._items.popleft()
+                self.metrics.queue_depth = self._depth()
+                self._cond.notify_all()
+            started = time.perf_counter()
+            try:
+                self.handler.handle(e)
+            except Exception as exc:
+                self.metrics.errors += 1
+                self.metrics.last_error = exc
+                logger.exception("Handler %r failed on %r", self.handler, e)
+            self.metrics.record(time.perf_counter() - started)
+        return True
+
+    def wait_idle(self, timeout: Optional[float]) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._scheduled, timeout)
+
+    def close(self) -> None:
+        if self._spill is not None:
+            self._spill.close()
+
+    def _depth(self) -> int:
+        return len(self._items) + (len(self._spill) if self._spill is not None else 0)
+
+class AsyncEventBus(EventBus):
+    def __init__(self, workers: int = 4, queue_size: int = 1024,
+                 policy: BackpressurePolicy = BackpressurePolicy.BLOCK,
+                 block_timeout: Optional[float] = None, max_batch: int = 64,
+                 journal: Optional[EventJournal] = None):
+        super().__init__(journal)
+        self._queue_size = queue_size
+        self._policy = policy
+        self._block_timeout = block_timeout
+        self._max_batch = max_batch
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="event-bus")
+        # keyed by id() so unhashable or equal-comparing handlers each get their own queue
+        self._queues: dict[int, _HandlerQueue] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, typ: type, handler: IEventHandler) -> None:
+        super().subscribe(typ, handler)
+        with self._lock:
+            if id(handler) not in self._queues:
+                self._queues[id(handler)] = _HandlerQueue(handler, self._queue_size, self._policy,
+                                                          self._block_timeout)
+
+    def unsubscribe(self, typ: type, handler: IEventHandler) -> None:
+        super().unsubscribe(typ, handler)
+        with self._lock:
+            if self._is_subscribed(handler):
+                return
+            q = self._queues.pop(id(handler), None)
+        if q is not None:
+            # events already queued are still delivered before the queue goes away
+            q.wait_idle(None)
+            q.close()
+
+    def publish(self, e: IEvent) -> None:
+        if self._journal is not None:
+            self._journal.append(e)
+        for handler in self._handlers_for(e):
+            q = self._queues.get(id(handler))
+            # None if the handler was unsubscribed while this publish was resolving
+            if q is not None and q.offer(e):
+                self._executor.submit(self._run, q)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for q in list(self._queues.values()):
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not q.wait_idle(left):
+                return False
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        if wait:
+            self.flush()
+        self._executor.shutdown(wait=wait)
+        for q in self._queues.values():
+            q.close()
+
+    def get_metrics(self) -> list[tuple[IEventHandler, HandlerMetrics]]:
+        # pairs rather than a dict, since handlers need not be hashable
+        return [(q.handler, q.metrics) for q in self._queues.values()]
+
+    def get_handler_metrics(self, handler: IEventHandler) -> Optional[HandlerMetrics]:
+        q = self._queues.get(id(handler))
+        return q.metrics if q is not None else None
+
+    def _run(self, q: _HandlerQueue) -> None:
+        if q.drain(self._max_batch):
+            # yield the worker so one busy handler can't starve the others
+            self._executor.submit(self._run, q)
@@ -1,11 +1,14 @@
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Protocol
+from typing import TYPE_CHECKING, Optional, Protocol
 import uuid
 
 from money import Money
 
+if TYPE_CHECKING:
+    from events.journal import EventJournal
+
 class IEvent: ...
 
 @dataclass
@@ -32,16 +35,58 @@ class AnalyticsHandler:
         print(f"AnalyticsHandler: event received {e}")
 
 class EventBus:
-    def __init__(self):
+    def __init__(self, journal: Optional["EventJournal"] = None):
         self._subscribers: dict[type, list[IEventHandler]] = defaultdict(list)
+        self._journal = journal
+        # concrete event type -> handlers along its MRO, rebuilt lazily after (un)subscribe
+        self._resolved: dict[type, tuple[IEventHandler, ...]] = {}
 
     def subscribe(self, typ: type, handler: IEventHandler) -> None:
         self._subscribers[typ].append(handler)
+        self._resolved.clear()
 
     def publish(self, e: IEvent) -> None:
-        for handler in self._subscribers.get(type(e), []):
+        if self._journal is not None:
+            self._journal.append(e)
+        for handler in self._handlers_for(e):
             handler.handle(e)
 
+    def replay(self, from_seq: int = 0, handler: Optional[IEventHandler] = None) -> int:
+        # re-delivers journaled events without journaling them again, returns the next offset
+        if self._journal is None:
+            raise RuntimeError("EventBus has no journal to replay")
+        next_seq = from_seq
+        for seq, e in self._journal.read(from_seq):
+            for h in ([handler] if handler is not None else self._handlers_for(e)):
+                h.handle(e)
+            next_seq = seq + 1
+        return next_seq
+
+    def _handlers_for(self, e: IEvent) -> tuple[IEventHandler, ...]:
+        handlers = self._resolved.get(type(e))
+        if handlers is None:
+            handlers = self._resolve(type(e))
+        return handlers
+
+    def _resolve(self, typ: type) -> tuple[IEventHandler, ...]:
+        # most specific type first; a handler subscribed at several levels is called once
+        # keyed by id() so unhashable handlers (e.g. plain dataclasses) still work
+        seen: dict[int, IEventHandler] = {}
+        for cls in typ.__mro__:
+            for handler in self._subscribers.get(cls, ()):
+                seen.setdefault(id(handler), handler)
+        handlers = tuple(seen.values())
+        self._resolved[typ] = handlers
+        return handlers
+
     def unsubscribe(self, typ: type, handler: IEventHandler) -> None:
-        if handler in self._subscribers.get(typ, []):
-            self._subscribers[typ].remove(handler)
+        # by identity, like _resolve, so equal-but-distinct handlers stay separate
+        handlers = self._subscribers.get(typ, [])
+        for i, h in enumerate(handlers):
+            if h is handler:
+                del handlers[i]
+                self._resolved.clear()
+                return
+
+    def _is_subscribed(self, handler: IEventHandler) -> bool:
+        return any(h is handler for handlers in self._subscribers.values() for h in handlers)
@@ -0,0 +1,197 @@
+from bisect import bisect_right
+from enum import Enum
+from typing import Callable, Iterator, Optional
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+from events.bus import IEvent
+
+# record header: body length, crc32 of body, sequence number
+_HEADER = struct.Struct("<IIQ")
+_SUFFIX = ".log"
+
+
+class FsyncPolicy(Enum):
+    ALWAYS = "always"
+    BATCH = "batch"
+    NEVER = "never"
+
+class EventJournal:
+    def __init__(self, directory: str, segment_bytes: int = 64 << 20,
+                 fsync: FsyncPolicy = FsyncPolicy.BATCH, fsync_every: int = 256,
+                 fsync_interval: float = 0.05, clock: Callable[[], float] = time.monotonic,
+                 first_seq: int = 0):
+        self._dir = directory
+        self._segment_bytes = segment_bytes
+        self._fsync = fsync
+        self._fsync_every = fsync_every
+        self._fsync_interval = fsync_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = clock()
+        os.makedirs(directory, exist_ok=True)
+        # first sequence number of every segment, ascending
+        self._segments: list[int] = sorted(int(n[:-len(_SUFFIX)]) for n in os.listdir(directory)
+                                           if n.endswith(_SUFFIX))
+        # first_seq only matters for a new journal, e.g. one rewritten by a checkpoint
+        self._next_seq = first_seq
+        self._writer = None
+        if self._segments:
+            self._next_seq = self._recover_tail()
+        self._open_writer()
+        # under BATCH an idle journal still gets its pending records synced within the interval
+        self._stop = threading.Event()
+        self._syncer: Optional[threading.Thread] = None
+        if fsync is FsyncPolicy.BATCH and fsync_interval != float("inf"):
+            self._syncer = threading.Thread(target=self._sync_loop, name="journal-fsync", daemon=True)
+            self._syncer.start()
+
+    def append(self, e: IEvent) -> int:
+        return self.append_bytes(pickle.dumps(e, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def append_bytes(self, body: bytes) -> int:
+        # body must be a pickle; lets callers serialize a batch up front before writing any of it
+        with self._lock:
+            seq = self._next_seq
+            if self._writer.tell() >= self._segment_bytes:
+                self._roll(seq)
+            self._writer.write(_HEADER.pack(len(body), zlib.crc32(body), seq))
+            self._writer.write(body)
+            self._next_seq = seq + 1
+            self._unsynced += 1
+            self._maybe_sync()
+            return seq
+
+    def read(self, from_seq: int = 0) -> Iterator[tuple[int, IEvent]]:
+        with self._lock:
+            self._writer.flush()
+            segments = list(self._segments)
+            end = self._next_seq
+        start = max(0, bisect_right(segments, from_seq) - 1)
+        for first in segments[start:]:
+            with open(self._segment_path(first), "rb", buffering=1 << 20) as f:
+                for seq, body in self._records(f, skip_before=from_seq):
+                    if seq >= end:
+                        return
+                    yield seq, pickle.loads(body)
+
+    def sync(self) -> None:
+        with self._lock:
+            self._sync_locked()
+
+    def get_directory(self) -> str:
+        return self._dir
+
+    def get_next_seq(self) -> int:
+        return self._next_seq
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._syncer is not None and self._syncer is not threading.current_thread():
+            self._syncer.join()
+        with self._lock:
+            if self._writer is not None:
+                self._sync_locked()
+                self._writer.close()
+                self._writer = None
+
+    def _maybe_sync(self) -> None:
+        # every record reaches the OS at once, so a process crash loses nothing; only the
+        # fsync (which protects against power loss) is batched
+        self._writer.flush()
+        if self._fsync is FsyncPolicy.ALWAYS:
+            self._sync_locked()
+        elif self._fsync is FsyncPolicy.BATCH:
+            if (self._unsynced >= self._fsync_every
+                    or self._clock() - self._last_sync >= self._fsync_interval):
+                self._sync_locked()
+
+    def _sync_loop(self) -> None:
+        while not self._stop.wait(self._fsync_interval):
+            with self._lock:
+                if self._writer is not None and self._unsynced:
+                    self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        self._writer.flush()
+        if self._fsync is not FsyncPolicy.NEVER:
+            os.fsync(self._writer.fileno())
+        self._unsynced = 0
+        self._last_sync = self._clock()
+
+    def _roll(self, first_seq: int) -> None:
+        self._sync_locked()
+        self._writer.close()
+        self._segments.append(first_seq)
+        self._writer = open(self._segment_path(first_seq), "ab")
+
+    def _open_writer(self) -> None:
+        if not self._segments:
+            self._segments.append(self._next_seq)
+        self._writer = open(self._segment_path(self._segments[-1]), "ab")
+
+    def _recover_tail(self) -> int:
+        # walk the last segment and cut off a torn or corrupt tail record
+        path = self._segment_path(self._segments[-1])
+        next_seq = self._segments[-1]
+        valid_end = 0
+        with open(path, "rb") as f:
+            for seq, _ in self._records(f):
+                next_seq = seq + 1
+                valid_end = f.tell()
+        if valid_end < os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(valid_end)
+        return next_seq
+
+    def _segment_path(self, first_seq: int) -> str:
+        return os.path.join(self._dir, f"{first_seq:020d}{_SUFFIX}")
+
+    @staticmethod
+    def _records(f, skip_before: int = 0) -> Iterator[tuple[int, bytes]]:
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            length, crc, seq = _HEADER.unpack(header)
+            if seq < skip_before:
+                f.seek(length, os.SEEK_CUR)
+                continue
+            body = f.read(length)
+            if len(body) < length or zlib.crc32(body) != crc:
+                return
+            yield seq, body
+
+class JournalConsumer:
+    def __init__(self, journal: EventJournal, name: str, offsets_dir: Optional[str] = None):
+        self._journal = journal
+        self._path = os.path.join(offsets_dir or os.path.join(journal.get_directory(), "offsets"), name)
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        self._offset = 0
+        if os.path.exists(self._path):
+            with open(self._path) as f:
+                self._offset = int(f.read().strip() or 0)
+
+    def poll(self, max_events: Optional[int] = None) -> Iterator[tuple[int, IEvent]]:
+        for n, (seq, e) in enumerate(self._journal.read(self._offset)):
+            if max_events is not None and n >= max_events:
+                return
+            yield seq, e
+            self._offset = seq + 1
+
+    def seek(self, offset: int) -> None:
+        self._offset = offset
+
+    def commit(self) -> None:
+        tmp = self._path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(str(self._offset))
+        os.replace(tmp, self._path)
+
+    def get_offset(self) -> int:
+        return self._offset
@@ -0,0 +1,64 @@
+from typing import Any, Callable, Hashable, Optional
+import threading
+import time
+
+from listings.cache import CacheStats, LRUCache
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class IdempotencyStore:
+    # Results are remembered per client-supplied key for ttl seconds. A duplicate that arrives
+    # while the first call is still running waits for it instead of running again.
+    def __init__(self, max_size: int = 100_000, ttl: Optional[float] = 24 * 3600.0,
+                 cache_failures: bool = False, clock: Callable[[], float] = time.monotonic):
+        self._results = LRUCache(max_size, ttl, clock)
+        # failed results (success == False) are shared with concurrent duplicates but not kept,
+        # so a later retry with the same key gets a real second attempt
+        self._cache_failures = cache_failures
+        self._inflight: dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def execute(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            hit, result = self._results.lookup(key)
+            if hit:
+                return result
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _InFlight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.error is None and (self._cache_failures or getattr(flight.result, "success", True)):
+                    self._results.put(key, flight.result)
+            flight.done.set()
+        return flight.result
+
+    def forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._results.pop(key)
+
+    def get_stats(self) -> CacheStats:
+        return self._results.stats
+
+    def __len__(self) -> int:
+        return len(self._results)
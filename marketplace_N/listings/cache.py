@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+import threading
+import time
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __repr__(self) -> str:
+        return (f"CacheStats(hits={self.hits}, misses={self.misses}, "
+                f"evictions={self.evictions}, expirations={self.expirations}, "
+                f"hit_rate={self.get_hit_rate():.3f})")
+
+class LRUCache:
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 on_evict: Optional[Callable[[Hashable], None]] = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        # called with the key of every entry dropped for size or expiry, not on pop/clear
+        self._on_evict = on_evict
+        # key -> (value, expires_at or None)
+        self._entries: OrderedDict[Hashable, tuple[Any, Optional[float]]] = OrderedDict()
+        # proxies share one cache across threads; on_evict runs outside it
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def lookup(self, key: Hashable) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return False, None
+            value, expires_at = entry
+            if expires_at is None or expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return True, value
+            del self._entries[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+        if self._on_evict is not None:
+            self._on_evict(key)
+        return False, None
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self._ttl if ttl is None else ttl
+        evicted = []
+        with self._lock:
+            expires_at = self._clock() + ttl if ttl is not None else None
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                evicted.append(self._entries.popitem(last=False)[0])
+                self.stats.evictions += 1
+        if self._on_evict is not None:
+            for k in evicted:
+                self._on_evict(k)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_max_size(self) -> int:
+        return self._max_size
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,207 @@
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+import mmap
+import os
+import struct
+import uuid
+
+from listings.index import ListingIndex
+from listings.models import Listing
+from listings.serialization import decode_listing, encode_listing
+
+# record header: body length, op code, listing id
+_HEADER = struct.Struct("<IB16s")
+_OP_PUT = 1
+_OP_DELETE = 2
+
+
+# Append-only log with an in-memory offset index. One process writes; any number of
+# processes may open the same file with read_only=True and call refresh() to pick up
+# new records. Reads go through mmap, so readers share the OS page cache.
+class FileListingRepository:
+    def __init__(self, path: str, read_only: bool = False, sync: bool = False,
+                 compact_ratio: Optional[float] = 0.5, compact_min_bytes: int = 1 << 20):
+        self._path = path
+        self._read_only = read_only
+        self._sync = sync
+        self._compact_ratio = compact_ratio
+        self._compact_min_bytes = compact_min_bytes
+        self._offsets: dict[uuid.UUID, tuple[int, int]] = {}
+        self._index = ListingIndex()
+        self._dead_bytes = 0
+        self._end = 0
+        self._ino: Optional[int] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._writer = None
+        self._open()
+
+    def save(self, listing: Listing) -> None:
+        self._append([(listing.id, _OP_PUT, encode_listing(listing))])
+        self._index.add(listing)
+        self._maybe_compact()
+
+    def save_many(self, listings: Iterable[Listing]) -> None:
+        listings = list(listings)
+        self._append([(l.id, _OP_PUT, encode_listing(l)) for l in listings])
+        for l in listings:
+            self._index.add(l)
+        self._maybe_compact()
+
+    def find(self, id: uuid.UUID) -> Optional[Listing]:
+        loc = self._offsets.get(id)
+        if loc is None:
+            return None
+        start, length = loc
+        self._map(start + length)
+        return decode_listing(self._mm[start:start + length])
+
+    def find_many(self, ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, Listing]:
+        found: dict[uuid.UUID, Listing] = {}
+        for id in ids:
+            listing = self.find(id)
+            if listing is not None:
+                found[id] = listing
+        return found
+
+    def update(self, id: uuid.UUID, listing: Listing) -> None:
+        if id not in self._offsets:
+            raise KeyError("Listing not found")
+        self.save(listing)
+
+    def delete(self, id: uuid.UUID) -> None:
+        if id not in self._offsets:
+            return
+        self._append([(id, _OP_DELETE, b"")])
+        self._index.remove(id)
+        self._maybe_compact()
+
+    def find_by_seller(self, seller_id: uuid.UUID) -> Iterator[Listing]:
+        return self._resolve(self._index.ids_by_seller(seller_id))
+
+    def find_by_product_type(self, product_type: str) -> Iterator[Listing]:
+        return self._resolve(self._index.ids_by_product_type(product_type))
+
+    def find_created_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             product_type: Optional[str] = None) -> Iterator[Listing]:
+        return self._resolve(self._index.ids_created_between(start, end, product_type))
+
+    def refresh(self) -> None:
+        st = os.stat(self._path)
+        if st.st_ino != self._ino:
+            # the writer compacted the log into a new file
+            self.close()
+            self._offsets.clear()
+            self._index.clear()
+            self._dead_bytes = 0
+            self._end = 0
+            self._open()
+        elif st.st_size > self._end:
+            self._scan(st.st_size)
+
+    def compact(self) -> None:
+        if self._read_only:
+            raise PermissionError("Repository is opened read-only")
+        tmp_path = self._path + ".compact"
+        with open(tmp_path, "wb") as out:
+            for id, (start, length) in self._offsets.items():
+                self._map(start + length)
+                out.write(_HEADER.pack(length, _OP_PUT, id.bytes))
+                out.write(self._mm[start:start + length])
+            out.flush()
+            os.fsync(out.fileno())
+        self.close()
+        os.replace(tmp_path, self._path)
+        self._offsets.clear()
+        self._index.clear()
+        self._dead_bytes = 0
+        self._end = 0
+        self._open()
+
+    def get_dead_bytes(self) -> int:
+        return self._dead_bytes
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _open(self) -> None:
+        if not self._read_only:
+            self._writer = open(self._path, "ab")
+        st = os.stat(self._path)
+        self._ino = st.st_ino
+        valid_end = self._scan(st.st_size)
+        if not self._read_only and valid_end < st.st_size:
+            # drop a torn record left by a crash mid-append
+            self._writer.truncate(valid_end)
+
+    def _scan(self, size: int) -> int:
+        pos = self._end
+        if size > pos:
+            self._map(size)
+        while pos + _HEADER.size <= size:
+            length, op, raw_id = _HEADER.unpack_from(self._mm, pos)
+            start = pos + _HEADER.size
+            if start + length > size:
+                break
+            self._apply(uuid.UUID(bytes=raw_id), op, start, length)
+            if op == _OP_PUT:
+                self._index.add(decode_listing(self._mm[start:start + length]))
+            pos = start + length
+        self._end = pos
+        return pos
+
+    def _append(self, records: list[tuple[uuid.UUID, int, bytes]]) -> None:
+        if self._read_only:
+            raise PermissionError("Repository is opened read-only")
+        chunks = []
+        pos = self._end
+        applied = []
+        for id, op, body in records:
+            chunks.append(_HEADER.pack(len(body), op, id.bytes))
+            chunks.append(body)
+            applied.append((id, op, pos + _HEADER.size, len(body)))
+            pos += _HEADER.size + len(body)
+        self._writer.write(b"".join(chunks))
+        self._writer.flush()
+        if self._sync:
+            os.fsync(self._writer.fileno())
+        for id, op, start, length in applied:
+            self._apply(id, op, start, length)
+        self._end = pos
+
+    def _apply(self, id: uuid.UUID, op: int, start: int, length: int) -> None:
+        old = self._offsets.pop(id, None)
+        if old is not None:
+            self._dead_bytes += _HEADER.size + old[1]
+        if op == _OP_PUT:
+            self._offsets[id] = (start, length)
+        else:
+            self._index.remove(id)
+            self._dead_bytes += _HEADER.size
+
+    def _map(self, size: int) -> None:
+        if self._mm is not None and len(self._mm) >= size:
+            return
+        if self._mm is not None:
+            self._mm.close()
+        with open(self._path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _maybe_compact(self) -> None:
+        if self._compact_ratio is None or self._end < self._compact_min_bytes:
+            return
+        if self._dead_bytes / self._end >= self._compact_ratio:
+            self.compact()
+
+    def _resolve(self, ids: Iterator[uuid.UUID]) -> Iterator[Listing]:
+        for id in ids:
+            found = self.find(id)
+            if found is not None:
+                yield found
@@ -0,0 +1,89 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterator, Optional
+import uuid
+
+from listings.models import Listing
+
+
+class ListingIndex:
+    def __init__(self):
+        # dicts are used as insertion-ordered sets
+        self._by_seller: dict[uuid.UUID, dict[uuid.UUID, None]] = defaultdict(dict)
+        self._by_type: dict[str, dict[uuid.UUID, None]] = defaultdict(dict)
+        self._by_created: list[tuple[datetime, uuid.UUID]] = []
+        # keys the listing was indexed under, so in-place mutation of a listing can't orphan entries
+        self._keys: dict[uuid.UUID, tuple[uuid.UUID, str, datetime]] = {}
+
+    def add(self, listing: Listing) -> None:
+        if listing.id in self._keys:
+            self.remove(listing.id)
+        keys = (listing.seller_id, listing.product_type, listing.created_at)
+        self._keys[listing.id] = keys
+        self._by_seller[keys[0]][listing.id] = None
+        self._by_type[keys[1]][listing.id] = None
+        insort(self._by_created, (keys[2], listing.id))
+
+    def remove(self, id: uuid.UUID) -> None:
+        keys = self._keys.pop(id, None)
+        if keys is None:
+            return
+        seller_id, product_type, created_at = keys
+        self._discard(self._by_seller, seller_id, id)
+        self._discard(self._by_type, product_type, id)
+        pos = bisect_left(self._by_created, (created_at, id))
+        if pos < len(self._by_created) and self._by_created[pos] == (created_at, id):
+            del self._by_created[pos]
+
+    def ids_by_seller(self, seller_id: uuid.UUID) -> Iterator[uuid.UUID]:
+        return iter(tuple(self._by_seller.get(seller_id, ())))
+
+    def ids_by_product_type(self, product_type: str) -> Iterator[uuid.UUID]:
+        return iter(tuple(self._by_type.get(product_type, ())))
+
+    def ids_created_between(self, start: Optional[datetime] = None,
+                            end: Optional[datetime] = None,
+                            product_type: Optional[str] = None) -> Iterator[uuid.UUID]:
+        # half-open range [start, end)
+        lo = 0 if start is None else bisect_left(self._by_created, (start,))
+        hi = len(self._by_created) if end is None else bisect_left(self._by_created, (end,))
+        if product_type is None:
+            return (id for _, id in self._by_created[lo:hi])
+        bucket = self._by_type.get(product_type, {})
+        if len(bucket) < hi - lo:
+            # the type bucket is the narrower side, filter it by time instead, then sort it into
+            # the same (created_at, id) order the other branch yields
+            keys = self._keys
+            hits = sorted((keys[id][2], id) for id in bucket
+                          if (start is None or keys[id][2] >= start) and (end is None or keys[id][2] < end))
+            return (id for _, id in hits)
+        return self._filter((id for _, id in self._by_created[lo:hi]),
+                            lambda k: k[1] == product_type)
+
+    def _filter(self, ids, pred) -> Iterator[uuid.UUID]:
+        for id in ids:
+            keys = self._keys.get(id)
+            if keys is not None and pred(keys):
+                yield id
+
+    def count_by_seller(self, seller_id: uuid.UUID) -> int:
+        return len(self._by_seller.get(seller_id, ()))
+
+    def count_by_product_type(self, product_type: str) -> int:
+        return len(self._by_type.get(product_type, ()))
+
+    def clear(self) -> None:
+        self._by_seller.clear()
+        self._by_type.clear()
+        self._by_created.clear()
+        self._keys.clear()
+
+    @staticmethod
+    def _discard(index: dict, key, id: uuid.UUID) -> None:
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.pop(id, None)
+        if not bucket:
+            del index[key]
@@ -11,6 +11,8 @@ class Listing:
     payload: dict[str, Any]
     created_at: datetime
     seller_id: uuid.UUID
+    # bumped on every payload update, lets caches key on (id, version)
+    version: int = 0
 
     def get_id(self) -> uuid.UUID:
         return self.id
@@ -25,4 +27,7 @@ class Listing:
         return self.created_at
 
     def get_seller_id(self) -> uuid.UUID:
-        return self.seller_id
\ No newline at end of file
+        return self.seller_id
+
+    def get_version(self) -> int:
+        return self.version
\ No newline at end of file
@@ -1,54 +1,148 @@
-from typing import Optional, Protocol
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Protocol
 import uuid
+from listings.cache import CacheStats, LRUCache
+from listings.index import ListingIndex
 from listings.models import Listing
 
 
 class IListingRepository(Protocol):
     def save(self, listing: Listing) -> None: ...
+    def save_many(self, listings: Iterable[Listing]) -> None: ...
     def find(self, id: uuid.UUID) -> Optional[Listing]: ...
+    def find_many(self, ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, Listing]: ...
     def update(self, id: uuid.UUID, listing: Listing) -> None: ...
     def delete(self, id: uuid.UUID) -> None: ...
 
+class IListingQueries(Protocol):
+    def find_by_seller(self, seller_id: uuid.UUID) -> Iterator[Listing]: ...
+    def find_by_product_type(self, product_type: str) -> Iterator[Listing]: ...
+    def find_created_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             product_type: Optional[str] = None) -> Iterator[Listing]: ...
+
 class ListingRepository:
     def __init__(self):
         self._storage: dict[uuid.UUID, Listing] = {}
+        self._index = ListingIndex()
 
     def save(self, listing: Listing) -> None:
         self._storage[listing.id] = listing
+        self._index.add(listing)
+
+    def save_many(self, listings: Iterable[Listing]) -> None:
+        listings = list(listings)
+        self._storage.update((l.id, l) for l in listings)
+        for l in listings:
+            self._index.add(l)
 
     def find(self, id: uuid.UUID) -> Optional[Listing]:
         return self._storage.get(id)
 
+    def find_many(self, ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, Listing]:
+        return {id: self._storage[id] for id in ids if id in self._storage}
+
     def update(self, id: uuid.UUID, listing: Listing) -> None:
         if id not in self._storage:
             raise KeyError("Listing not found")
         self._storage[id] = listing
+        self._index.add(listing)
 
     def delete(self, id: uuid.UUID) -> None:
         if id in self._storage:
             del self._storage[id]
+            self._index.remove(id)
+
+    def find_by_seller(self, seller_id: uuid.UUID) -> Iterator[Listing]:
+        return self._resolve(self._index.ids_by_seller(seller_id))
+
+    def find_by_product_type(self, product_type: str) -> Iterator[Listing]:
+        return self._resolve(self._index.ids_by_product_type(product_type))
+
+    def find_created_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             product_type: Optional[str] = None) -> Iterator[Listing]:
+        return self._resolve(self._index.ids_created_between(start, end, product_type))
+
+    def _resolve(self, ids: Iterator[uuid.UUID]) -> Iterator[Listing]:
+        for id in ids:
+            found = self._storage.get(id)
+            if found is not None:
+                yield found
 
 class ListingRepositoryCacheProxy(IListingRepository):
-    def __init__(self, storage: ListingRepository):
+    def __init__(self, storage: IListingRepository, max_size: int = 1024,
+                 ttl: Optional[float] = None, negative_ttl: float = 5.0,
+                 cache_misses: bool = True):
         self._storage = storage
-        self._cache: dict[uuid.UUID, Listing] = {}
+        self._cache = LRUCache(max_size=max_size, ttl=ttl)
+        # misses are only kept briefly: with a shared backend another process may create the id
+        self._negative_ttl = negative_ttl if ttl is None else min(ttl, negative_ttl)
+        self._cache_misses = cache_misses
 
     def find(self, id: uuid.UUID) -> Optional[Listing]:
-        if id in self._cache:
-            return self._cache[id]
+        cached, found = self._cache.lookup(id)
+        if cached:
+            # a cached None is a remembered miss
+            return found
         found = self._storage.find(id)
         if found:
-            self._cache[id] = found
+            self._cache.put(id, found)
+        elif self._cache_misses:
+            self._cache.put(id, None, ttl=self._negative_ttl)
+        return found
+
+    def find_many(self, ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, Listing]:
+        found: dict[uuid.UUID, Listing] = {}
+        missing: list[uuid.UUID] = []
+        for id in ids:
+            cached, listing = self._cache.lookup(id)
+            if not cached:
+                missing.append(id)
+            elif listing is not None:
+                found[id] = listing
+        if missing:
+            loaded = self._storage.find_many(missing)
+            for id in missing:
+                listing = loaded.get(id)
+                if listing is not None:
+                    self._cache.put(id, listing)
+                    found[id] = listing
+                elif self._cache_misses:
+                    self._cache.put(id, None, ttl=self._negative_ttl)
         return found
 
     def save(self, listing: Listing) -> None:
         self._storage.save(listing)
-        self._cache[listing.id] = listing
+        self._cache.put(listing.id, listing)
+
+    def save_many(self, listings: Iterable[Listing]) -> None:
+        listings = list(listings)
+        self._storage.save_many(listings)
+        for l in listings:
+            self._cache.put(l.id, l)
 
     def update(self, id: uuid.UUID, listing: Listing) -> None:
         self._storage.update(id, listing)
-        self._cache[id] = listing
+        self._cache.put(id, listing)
 
     def delete(self, id: uuid.UUID) -> None:
         self._storage.delete(id)
-        self._cache.pop(id, None)
\ No newline at end of file
+        self._cache.pop(id)
+
+    def find_by_seller(self, seller_id: uuid.UUID) -> Iterator[Listing]:
+        return self._storage.find_by_seller(seller_id)
+
+    def find_by_product_type(self, product_type: str) -> Iterator[Listing]:
+        return self._storage.find_by_product_type(product_type)
+
+    def find_created_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             product_type: Optional[str] = None) -> Iterator[Listing]:
+        return self._storage.find_created_between(start, end, product_type)
+
+    def invalidate(self, id: Optional[uuid.UUID] = None) -> None:
+        if id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(id)
+
+    def get_stats(self) -> CacheStats:
+        return self._cache.stats
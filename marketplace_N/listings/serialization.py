@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Any
+import json
+import uuid
+
+from listings.models import Listing
+
+
+def listing_to_dict(listing: Listing) -> dict[str, Any]:
+    return {"id": str(listing.id),
+            "product_type": listing.product_type,
+            "payload": listing.payload,
+            "created_at": listing.created_at.isoformat(),
+            "seller_id": str(listing.seller_id),
+            "version": listing.version}
+
+def listing_from_dict(d: dict[str, Any]) -> Listing:
+    return Listing(id=uuid.UUID(d["id"]),
+                   product_type=d["product_type"],
+                   payload=d["payload"],
+                   created_at=datetime.fromisoformat(d["created_at"]),
+                   seller_id=uuid.UUID(d["seller_id"]),
+                   version=d.get("version", 0))
+
+def encode_payload(payload: dict[str, Any]) -> bytes:
+    # Decimal/Money/UUID values fall back to str, which is how the payload stores prices anyway
+    return json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+
+def decode_payload(data: bytes) -> dict[str, Any]:
+    return json.loads(data)
+
+def encode_listing(listing: Listing) -> bytes:
+    return json.dumps(listing_to_dict(listing), separators=(",", ":"), default=str).encode("utf-8")
+
+def decode_listing(data: bytes) -> Listing:
+    return listing_from_dict(json.loads(data))
@@ -1,30 +1,106 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Iterable, Optional
 import uuid
+from catalog.factories import ICategoryFamilyFactory
+from catalog.products import AbstractProduct, ValidationError
 from catalog.registry import CategoryRegistry
 from listings.dto import ListingDTO
 from listings.models import Listing
 from listings.repository import IListingRepository
+from search.index import SearchIndex
 
+if TYPE_CHECKING:
+    from pricing.quote_cache import CachingPriceCalculator
+
+
+@dataclass
+class BulkCreateResult:
+    # aligned with the input order, None where the item failed
+    listings: list[Optional[Listing]] = field(default_factory=list)
+    errors: dict[int, Exception] = field(default_factory=dict)
+
+    def get_created(self) -> list[Listing]:
+        return [l for l in self.listings if l is not None]
 
 class ListingService:
-    def __init__(self, registry: CategoryRegistry, repo: IListingRepository):
+    def __init__(self, registry: CategoryRegistry, repo: IListingRepository,
+                 search_index: Optional[SearchIndex] = None,
+                 price_cache: Optional["CachingPriceCalculator"] = None):
         self._registry = registry
         self._repo = repo
+        self._search = search_index
+        self._price_cache = price_cache
 
     def create_listing(self, dto: ListingDTO) -> Listing:
         factory = self._registry.get_factory(dto.category_code)
+        listing, product = self._build_listing(factory, dto, datetime.utcnow())
+        self._repo.save(listing)
+        self._index(factory, listing, product)
+        return listing
+
+    def create_listings(self, dtos: Iterable[ListingDTO]) -> BulkCreateResult:
+        dtos = list(dtos)
+        result = BulkCreateResult(listings=[None] * len(dtos))
+        by_category: dict[str, list[int]] = defaultdict(list)
+        for i, dto in enumerate(dtos):
+            by_category[dto.category_code].append(i)
+
+        created_at = datetime.utcnow()
+        batch: list[Listing] = []
+        to_index: list[tuple[ICategoryFamilyFactory, Listing, AbstractProduct]] = []
+        for code, positions in by_category.items():
+            try:
+                factory = self._registry.get_factory(code)
+            except KeyError as e:
+                for i in positions:
+                    result.errors[i] = e
+                continue
+            attrs_batch = [self._listing_attrs(dtos[i]) for i in positions]
+            for i, product in zip(positions, factory.create_products(attrs_batch)):
+                if isinstance(product, ValidationError):
+                    result.errors[i] = product
+                    continue
+                listing = self._new_listing(product, dtos[i], created_at)
+                result.listings[i] = listing
+                batch.append(listing)
+                to_index.append((factory, listing, product))
+
+        if batch:
+            self._repo.save_many(batch)
+            for factory, listing, product in to_index:
+                self._index(factory, listing, product)
+        return result
+
+    def _build_listing(self, factory: ICategoryFamilyFactory, dto: ListingDTO,
+                       created_at: datetime) -> tuple[Listing, AbstractProduct]:
+        product = factory.create_product(self._listing_attrs(dto))
+        return self._new_listing(product, dto, created_at), product
+
+    @staticmethod
+    def _listing_attrs(dto: ListingDTO) -> dict[str, Any]:
         attrs = dict(dto.attributes)
+        # payload keeps the price as a string, pricing reads it from there
         attrs["price"] = str(dto.price.amount)
         attrs["currency"] = dto.price.currency
         attrs["title"] = dto.title
-        product = factory.create_product(attrs)
-        listing = Listing(id=uuid.uuid4(),
-                          product_type=product.__class__.__name__,
-                          payload=product.get_attributes(),
-                          created_at=datetime.utcnow(), seller_id=dto.seller_id)
-        self._repo.save(listing)
-        return listing
+        # registry code the listing was created under, promotions are scoped by it
+        attrs["category"] = dto.category_code
+        return attrs
+
+    @staticmethod
+    def _new_listing(product: AbstractProduct, dto: ListingDTO, created_at: datetime) -> Listing:
+        return Listing(id=uuid.uuid4(),
+                       product_type=product.__class__.__name__,
+                       payload=product.get_attributes(),
+                       created_at=created_at, seller_id=dto.seller_id)
+
+    def _index(self, factory: ICategoryFamilyFactory, listing: Listing, product: AbstractProduct) -> None:
+        if self._search is None:
+            return
+        # hits are listing ids, the mapper's own id is the product's
+        self._search.add(listing.id, factory.create_index_mapper().map(product))
 
     def get_listing(self, id: uuid.UUID) -> Optional[Listing]:
         return self._repo.find(id)
@@ -33,10 +109,21 @@ class ListingService:
         found = self._repo.find(id)
         if not found:
             raise KeyError("Listing not found")
-        # replace payload minimally
-        found.payload.update(dto.attributes)
+        # replace payload minimally, validating the merged result before anything is written
+        payload = {**found.payload, **dto.attributes}
+        factory = self._registry.get_factory(dto.category_code)
+        product = factory.create_product(dict(payload))
+        found.payload = payload
+        found.version += 1
         self._repo.update(id, found)
+        if self._price_cache is not None:
+            self._price_cache.invalidate(id)
+        self._index(factory, found, product)
         return found
 
     def delete_listing(self, id: uuid.UUID) -> None:
-        self._repo.delete(id)
\ No newline at end of file
+        self._repo.delete(id)
+        if self._search is not None:
+            self._search.remove(id)
+        if self._price_cache is not None:
+            self._price_cache.invalidate(id)
\ No newline at end of file
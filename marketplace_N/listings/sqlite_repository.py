@@ -0,0 +1,160 @@
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+import sqlite3
+import threading
+import uuid
+import zlib
+
+from listings.models import Listing
+from listings.serialization import decode_payload, encode_payload
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    id BLOB PRIMARY KEY,
+    product_type TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    created_at TEXT NOT NULL,
+    seller_id BLOB NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS listings_seller ON listings (seller_id);
+CREATE INDEX IF NOT EXISTS listings_type_created ON listings (product_type, created_at);
+CREATE INDEX IF NOT EXISTS listings_created ON listings (created_at);
+"""
+
+# statements are kept as module constants so sqlite3's per-connection statement cache reuses them
+_COLUMNS = "id, product_type, payload, created_at, seller_id, version"
+_UPSERT = f"INSERT OR REPLACE INTO listings ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)"
+_UPDATE = ("UPDATE listings SET product_type = ?, payload = ?, created_at = ?, seller_id = ?, version = ? "
+           "WHERE id = ?")
+_SELECT_ONE = f"SELECT {_COLUMNS} FROM listings WHERE id = ?"
+_DELETE = "DELETE FROM listings WHERE id = ?"
+_BY_SELLER = f"SELECT {_COLUMNS} FROM listings WHERE seller_id = ?"
+_BY_TYPE = f"SELECT {_COLUMNS} FROM listings WHERE product_type = ?"
+
+# SQLite's default limit on bound parameters per statement is 999 on older builds
+_MAX_PARAMS = 900
+# payloads at least this large are zlib-compressed, small ones stay plain JSON
+_COMPRESS_MIN = 256
+
+
+class SqliteListingRepository:
+    def __init__(self, path: str, timeout: float = 30.0, cached_statements: int = 64):
+        if path in ("", ":memory:"):
+            # every per-thread connection would open its own empty database
+            raise ValueError("SqliteListingRepository needs a file path, not an in-memory database")
+        self._path = path
+        self._timeout = timeout
+        self._cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[sqlite3.Connection] = []
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+
+    def save(self, listing: Listing) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(_UPSERT, self._to_row(listing))
+
+    def save_many(self, listings: Iterable[Listing]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.executemany(_UPSERT, (self._to_row(l) for l in listings))
+
+    def find(self, id: uuid.UUID) -> Optional[Listing]:
+        row = self._conn().execute(_SELECT_ONE, (id.bytes,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def find_many(self, ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, Listing]:
+        keys = [id.bytes for id in ids]
+        found: dict[uuid.UUID, Listing] = {}
+        conn = self._conn()
+        for i in range(0, len(keys), _MAX_PARAMS):
+            chunk = keys[i:i + _MAX_PARAMS]
+            sql = f"SELECT {_COLUMNS} FROM listings WHERE id IN ({','.join('?' * len(chunk))})"
+            for row in conn.execute(sql, chunk):
+                listing = self._from_row(row)
+                found[listing.id] = listing
+        return found
+
+    def update(self, id: uuid.UUID, listing: Listing) -> None:
+        conn = self._conn()
+        row = self._to_row(listing)
+        with conn:
+            cur = conn.execute(_UPDATE, row[1:] + (id.bytes,))
+        if cur.rowcount == 0:
+            raise KeyError("Listing not found")
+
+    def delete(self, id: uuid.UUID) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(_DELETE, (id.bytes,))
+
+    def find_by_seller(self, seller_id: uuid.UUID) -> Iterator[Listing]:
+        return self._query(_BY_SELLER, (seller_id.bytes,))
+
+    def find_by_product_type(self, product_type: str) -> Iterator[Listing]:
+        return self._query(_BY_TYPE, (product_type,))
+
+    def find_created_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             product_type: Optional[str] = None) -> Iterator[Listing]:
+        clauses, params = [], []
+        if product_type is not None:
+            clauses.append("product_type = ?")
+            params.append(product_type)
+        if start is not None:
+            clauses.append("created_at >= ?")
+            params.append(start.isoformat(timespec="microseconds"))
+        if end is not None:
+            clauses.append("created_at < ?")
+            params.append(end.isoformat(timespec="microseconds"))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._query(f"SELECT {_COLUMNS} FROM listings{where} ORDER BY created_at", tuple(params))
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # each connection stays on its own thread; the flag only lets close() run from any thread
+            conn = sqlite3.connect(self._path, timeout=self._timeout,
+                                   cached_statements=self._cached_statements,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _query(self, sql: str, params: tuple) -> Iterator[Listing]:
+        for row in self._conn().execute(sql, params):
+            yield self._from_row(row)
+
+    @staticmethod
+    def _to_row(listing: Listing) -> tuple:
+        payload = encode_payload(listing.payload)
+        if len(payload) >= _COMPRESS_MIN:
+            payload = zlib.compress(payload)
+        return (listing.id.bytes, listing.product_type, payload,
+                listing.created_at.isoformat(timespec="microseconds"), listing.seller_id.bytes,
+                listing.version)
+
+    @staticmethod
+    def _from_row(row: tuple) -> Listing:
+        id, product_type, payload, created_at, seller_id, version = row
+        # plain JSON objects start with '{', anything else is a zlib stream
+        if payload[:1] != b"{":
+            payload = zlib.decompress(payload)
+        return Listing(id=uuid.UUID(bytes=id),
+                       product_type=product_type,
+                       payload=decode_payload(payload),
+                       created_at=datetime.fromisoformat(created_at),
+                       seller_id=uuid.UUID(bytes=seller_id),
+                       version=version)
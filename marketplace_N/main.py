@@ -11,12 +11,13 @@ from listings.service import ListingService
 from money import Money
 from orders.commands import CommandBus, PlaceOrderCommand
 from orders.context import OrderContext
-from orders.handlers import CartValidationHandler, FraudCheckHandler, PaymentValidationHandler, StockReservationHandler
 from orders.models import Item, Order
+from orders.pipeline import default_validation_pipeline
 from payments.gateways import StripeAdapter
 from payments.proxy import PaymentGatewayProxy, RetryPolicy
 from payments.strategies import StripeStrategy
 from pricing.calculators import BasePriceCalculator, PromotionDecorator, TaxDecorator
+from search.index import SearchIndex
 
 
 
@@ -29,7 +30,8 @@ if __name__ == "__main__":
     # create repository and service
     repo = ListingRepository()
     repo_proxy = ListingRepositoryCacheProxy(repo)
-    service = ListingService(registry, repo_proxy)
+    search_index = SearchIndex()
+    service = ListingService(registry, repo_proxy, search_index)
 
     # create listing DTO
     dto = ListingDTO(title="Smartphone",
@@ -40,20 +42,18 @@ if __name__ == "__main__":
 
     listing = service.create_listing(dto)
     print("Created listing:", listing)
+    print("Search 'smartphone':", search_index.search("smartphone"))
 
     # create an order
     item = Item(listing_id=listing.get_id(), quantity=1, price_per_unit=Money(Decimal("399.99"), "USD"))
     order = Order(items=[item], buyer_id=uuid.uuid4())
     ctx = OrderContext(order)
 
-    # handlers chain
-    cart_h = CartValidationHandler()
-    stock_h = StockReservationHandler()
-    pay_h = PaymentValidationHandler()
-    fraud_h = FraudCheckHandler()
-    cart_h.set_next(stock_h).set_next(pay_h).set_next(fraud_h)
-    ok = cart_h.handle(ctx)
-    print("Handlers passed:", ok)
+    # validation pipeline: stock, payment and fraud run in parallel after the cart check
+    pipeline = default_validation_pipeline()
+    validation = pipeline.run(ctx)
+    pipeline.shutdown()
+    print("Handlers passed:", validation.ok)
 
     # payments
     stripe = StripeAdapter(api_key="sk_test")
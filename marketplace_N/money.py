@@ -1,20 +1,131 @@
 from __future__ import annotations
-from dataclasses import dataclass, field
-from decimal import Decimal
-from typing import Any, List, Optional, Protocol, runtime_checkable
-from abc import ABC, abstractmethod
-import uuid
-from datetime import datetime
-
-@dataclass(frozen=True)
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Iterable, Union
+import operator
+
+# ISO 4217 minor unit exponents that differ from the default of 2
+CURRENCY_EXPONENTS: dict[str, int] = {
+    "BHD": 3, "IQD": 3, "JOD": 3, "KWD": 3, "LYD": 3, "OMR": 3, "TND": 3,
+    "BIF": 0, "CLP": 0, "DJF": 0, "GNF": 0, "ISK": 0, "JPY": 0, "KMF": 0, "KRW": 0,
+    "PYG": 0, "RWF": 0, "UGX": 0, "VND": 0, "VUV": 0, "XAF": 0, "XOF": 0, "XPF": 0,
+}
+DEFAULT_EXPONENT = 2
+DEFAULT_ROUNDING = ROUND_HALF_EVEN
+
+Number = Union[Decimal, int, str]
+
+
+def currency_exponent(currency: str) -> int:
+    return CURRENCY_EXPONENTS.get(currency, DEFAULT_EXPONENT)
+
+def to_minor(amount: Number, currency: str, rounding: str = DEFAULT_ROUNDING) -> int:
+    exp = currency_exponent(currency)
+    if isinstance(amount, int):
+        return amount * 10 ** exp
+    if not isinstance(amount, Decimal):
+        amount = Decimal(amount)
+    return int(amount.scaleb(exp).to_integral_value(rounding=rounding))
+
 class Money:
-    amount: Decimal
-    currency: str = "USD"
+    # amount is held as an integer count of the currency's minor unit (cents, yen, fils)
+    __slots__ = ("_minor", "currency")
+
+    def __init__(self, amount: Number, currency: str = "USD", rounding: str = DEFAULT_ROUNDING):
+        object.__setattr__(self, "_minor", to_minor(amount, currency, rounding))
+        object.__setattr__(self, "currency", currency)
+
+    @classmethod
+    def from_minor(cls, minor: int, currency: str = "USD") -> "Money":
+        m = object.__new__(cls)
+        object.__setattr__(m, "_minor", minor)
+        object.__setattr__(m, "currency", currency)
+        return m
+
+    @classmethod
+    def zero(cls, currency: str = "USD") -> "Money":
+        return cls.from_minor(0, currency)
+
+    @classmethod
+    def sum(cls, items: Iterable["Money"], currency: str = "USD") -> "Money":
+        minor = 0
+        for m in items:
+            if m.currency != currency:
+                raise ValueError("Different currencies")
+            minor += m._minor
+        return cls.from_minor(minor, currency)
+
+    @classmethod
+    def dot(cls, prices: Iterable["Money"], quantities: Iterable[int], currency: str = "USD") -> "Money":
+        # exact sum of price * quantity, integer math only
+        minors = []
+        for m in prices:
+            if m.currency != currency:
+                raise ValueError("Different currencies")
+            minors.append(m._minor)
+        return cls.from_minor(sum(map(operator.mul, minors, quantities)), currency)
+
+    @property
+    def amount(self) -> Decimal:
+        return Decimal(self._minor).scaleb(-currency_exponent(self.currency))
+
+    @property
+    def minor_units(self) -> int:
+        return self._minor
 
     def __add__(self, other: "Money") -> "Money":
         if self.currency != other.currency:
             raise ValueError("Different currencies")
-        return Money(self.amount + other.amount, self.currency)
+        return Money.from_minor(self._minor + other._minor, self.currency)
+
+    def __sub__(self, other: "Money") -> "Money":
+        if self.currency != other.currency:
+            raise ValueError("Different currencies")
+        return Money.from_minor(self._minor - other._minor, self.currency)
 
-    def __mul__(self, qty: int) -> "Money":
-        return Money(self.amount * Decimal(qty), self.currency)
+    def __mul__(self, qty: Union[int, Decimal]) -> "Money":
+        return self.multiply(qty)
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> "Money":
+        return Money.from_minor(-self._minor, self.currency)
+
+    def multiply(self, factor: Union[int, Decimal], rounding: str = DEFAULT_ROUNDING) -> "Money":
+        if isinstance(factor, int):
+            return Money.from_minor(self._minor * factor, self.currency)
+        scaled = (Decimal(self._minor) * factor).to_integral_value(rounding=rounding)
+        return Money.from_minor(int(scaled), self.currency)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self._minor == other._minor and self.currency == other.currency
+
+    def __hash__(self) -> int:
+        return hash((self._minor, self.currency))
+
+    def __lt__(self, other: "Money") -> bool:
+        return self._compare(other) < 0
+
+    def __le__(self, other: "Money") -> bool:
+        return self._compare(other) <= 0
+
+    def __gt__(self, other: "Money") -> bool:
+        return self._compare(other) > 0
+
+    def __ge__(self, other: "Money") -> bool:
+        return self._compare(other) >= 0
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError("Money is immutable")
+
+    def __reduce__(self):
+        return Money.from_minor, (self._minor, self.currency)
+
+    def __repr__(self) -> str:
+        return f"Money(amount={self.amount!r}, currency={self.currency!r})"
+
+    def _compare(self, other: "Money") -> int:
+        if self.currency != other.currency:
+            raise ValueError("Different currencies")
+        return (self._minor > other._minor) - (self._minor < other._minor)
@@ -1,9 +1,18 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Protocol
+from typing import TYPE_CHECKING, Any, Callable, Optional, Protocol
+import threading
+import time
+import uuid
 
 from events.bus import OrderPlacedEvent
 from orders.models import Order
 
+if TYPE_CHECKING:
+    from idempotency import IdempotencyStore
+    from orders.journal import CommandJournal
+
 
 class CommandResult:
     def __init__(self, success: bool, message: str = ""):
@@ -16,10 +25,11 @@ class ICommand(Protocol):
 
 class PlaceOrderCommand:
     def __init__(self, order: Order,
-                 event_bus: Optional[str]=None):
+                 event_bus: Optional[str]=None, idempotency_key: Optional[str] = None):
         self.order = order
         self._done = False
         self._event_bus = event_bus
+        self.idempotency_key = idempotency_key
 
     def execute(self) -> CommandResult:
         # in real life we would persist/order process
@@ -36,10 +46,20 @@ class PlaceOrderCommand:
             # revert placement
             self._done = False
 
+    def get_aggregate_id(self) -> uuid.UUID:
+        return self.order.get_id()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # the bus is process wiring, not command state; recovery re-binds it
+        state = self.__dict__.copy()
+        state["_event_bus"] = None
+        return state
+
 class CapturePaymentCommand:
-    def __init__(self, order: Order):
+    def __init__(self, order: Order, idempotency_key: Optional[str] = None):
         self.order = order
         self._captured = False
+        self.idempotency_key = idempotency_key
 
     def execute(self) -> CommandResult:
         self._captured = True
@@ -49,29 +69,241 @@ class CapturePaymentCommand:
         if self._captured:
             self._captured = False
 
-class CommandBus:
+    def get_aggregate_id(self) -> uuid.UUID:
+        return self.order.get_id()
+
+class CommandBusMetrics:
     def __init__(self):
-        self._queue: list[ICommand] = []
-        self._history: list[ICommand] = []
+        self.executed = 0
+        self.failed = 0
+        self.deduplicated = 0
+        self.batches = 0
+        self.busy_time = 0.0
+        self.max_latency = 0.0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.executed += 1
+        if not ok:
+            self.failed += 1
+        if latency > self.max_latency:
+            self.max_latency = latency
+
+    def get_throughput(self) -> float:
+        # commands per second of wall time spent executing
+        return self.executed / self.busy_time if self.busy_time else 0.0
+
+    def __repr__(self) -> str:
+        return (f"CommandBusMetrics(executed={self.executed}, failed={self.failed}, "
+                f"deduplicated={self.deduplicated}, batches={self.batches}, "
+                f"queue_depth={self.queue_depth}, max_queue_depth={self.max_queue_depth}, "
+                f"throughput={self.get_throughput():.1f}/s, max_latency={self.max_latency:.6f})")
+
+class CommandBus:
+    def __init__(self, history_size: int = 1024, workers: int = 0,
+                 journal: Optional["CommandJournal"] = None,
+                 idempotency: Optional["IdempotencyStore"] = None):
+        self._queue: deque[ICommand] = deque()
+        # (journal seq or None, command); oldest entries fall off once the undo window is full
+        self._history: deque[tuple[Optional[int], ICommand]] = deque(maxlen=history_size)
+        self._journal = journal
+        # commands with an idempotency_key run at most once per key while it is remembered
+        self._idempotency = idempotency
+        self._workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # aggregate id -> [lock, users]; keeps one order's commands serialized across callers
+        self._aggregate_locks: dict[Any, list] = {}
+        self._metrics = CommandBusMetrics()
 
     def enqueue(self, cmd: ICommand) -> None:
-        self._queue.append(cmd)
+        with self._lock:
+            self._queue.append(cmd)
+            self._track_depth()
 
     def execute_next(self) -> CommandResult:
-        if not self._queue:
-            return CommandResult(False, "Empty queue")
-        cmd = self._queue.pop(0)
-        res = cmd.execute()
-        if res.success:
-            self._history.append(cmd)
+        with self._lock:
+            if not self._queue:
+                return CommandResult(False, "Empty queue")
+            cmd = self._queue.popleft()
+            self._track_depth()
+        started = time.perf_counter()
+        seq = self._begin([cmd])[0]
+        res = self._execute(cmd, seq)
+        with self._lock:
+            self._metrics.busy_time += time.perf_counter() - started
         return res
 
+    def drain(self, max_batch: Optional[int] = None) -> list[CommandResult]:
+        # results come back in enqueue order
+        with self._lock:
+            n = len(self._queue) if max_batch is None else min(max_batch, len(self._queue))
+            batch = [self._queue.popleft() for _ in range(n)]
+            self._track_depth()
+        if not batch:
+            return []
+        started = time.perf_counter()
+        # the whole batch is made durable with a single group commit
+        seqs = self._begin(batch)
+        if self._workers <= 1:
+            results = [self._execute(cmd, seq) for cmd, seq in zip(batch, seqs)]
+        else:
+            # commands for one aggregate run in order on one worker; aggregates run in parallel
+            groups: dict[Any, list[int]] = {}
+            for i, cmd in enumerate(batch):
+                key = self._aggregate_of(cmd)
+                groups.setdefault(i if key is None else key, []).append(i)
+            results: list[Optional[CommandResult]] = [None] * n
+            executor = self._get_executor()
+            for f in [executor.submit(self._execute_group, batch, seqs, idx, results) for idx in groups.values()]:
+                f.result()
+        with self._lock:
+            self._metrics.batches += 1
+            self._metrics.busy_time += time.perf_counter() - started
+        return results
+
     def undo_last(self) -> None:
-        if not self._history:
-            return
-        cmd = self._history.pop()
+        with self._lock:
+            if not self._history:
+                return
+            seq, cmd = self._history.pop()
         cmd.undo()
+        if self._journal is not None and seq is not None:
+            self._journal.undone(seq)
+
+    def recover(self, replay: bool = True,
+                bind: Optional[Callable[[ICommand], None]] = None) -> list[CommandResult]:
+        # Rebuilds the undo history from the journal and settles commands a crash left
+        # half-done: replayed when replay is set, otherwise undone. bind re-attaches
+        # dependencies (event bus, gateways) that are not journaled.
+        if self._journal is None:
+            raise RuntimeError("CommandBus has no journal to recover from")
+        state = self._journal.scan()
+        for _, cmd in state.completed:
+            if bind is not None:
+                bind(cmd)
+        with self._lock:
+            self._history.extend(state.completed)
+        results = []
+        for seq, cmd in state.pending:
+            if bind is not None:
+                bind(cmd)
+            if replay:
+                results.append(self._execute(cmd, seq))
+                continue
+            cmd.undo()
+            self._journal.aborted(seq)
+            results.append(CommandResult(False, "Rolled back"))
+        # settled entries are dropped so the next recovery doesn't re-read them
+        self.checkpoint()
+        return results
+
+    def checkpoint(self) -> None:
+        if self._journal is None:
+            raise RuntimeError("CommandBus has no journal to checkpoint")
+        self._journal.checkpoint(self._history.maxlen or 0)
 
     def get_queue(self) -> list[ICommand]:
-        return list(self._queue)
+        with self._lock:
+            return list(self._queue)
+
+    def get_history(self) -> list[ICommand]:
+        with self._lock:
+            return [cmd for _, cmd in self._history]
+
+    def get_metrics(self) -> CommandBusMetrics:
+        return self._metrics
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _begin(self, batch: list[ICommand]) -> list[Optional[int]]:
+        if self._journal is None:
+            return [None] * len(batch)
+        try:
+            return self._journal.begin(batch)
+        except BaseException:
+            # nothing ran: put the batch back at the head of the queue
+            with self._lock:
+                self._queue.extendleft(reversed(batch))
+                self._track_depth()
+            raise
+
+    def _execute(self, cmd: ICommand, seq: Optional[int] = None) -> CommandResult:
+        aggregate = self._aggregate_of(cmd)
+        if aggregate is None:
+            return self._execute_once(cmd, seq)
+        with self._lock:
+            entry = self._aggregate_locks.get(aggregate)
+            if entry is None:
+                entry = self._aggregate_locks[aggregate] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                return self._execute_once(cmd, seq)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._aggregate_locks[aggregate]
+
+    def _execute_once(self, cmd: ICommand, seq: Optional[int]) -> CommandResult:
+        key = getattr(cmd, "idempotency_key", None)
+        if self._idempotency is None or key is None:
+            return self._run(cmd, seq)
+        ran = False
+
+        def run() -> CommandResult:
+            nonlocal ran
+            ran = True
+            return self._run(cmd, seq)
+
+        # scoped by command type so e.g. a capture never gets a placement's cached result
+        res = self._idempotency.execute((type(cmd).__name__, key), run)
+        if not ran:
+            # a duplicate: nothing executed, so close its journal entry rather than leave it to replay
+            if seq is not None:
+                self._journal.aborted(seq)
+            with self._lock:
+                self._metrics.deduplicated += 1
+        return res
+
+    def _run(self, cmd: ICommand, seq: Optional[int]) -> CommandResult:
+        started = time.perf_counter()
+        try:
+            res = cmd.execute()
+        except Exception as e:
+            res = CommandResult(False, str(e))
+        latency = time.perf_counter() - started
+        if seq is not None:
+            self._journal.complete(seq, cmd, res.success)
+        with self._lock:
+            self._metrics.record(latency, res.success)
+            if res.success:
+                self._history.append((seq, cmd))
+        return res
+
+    def _execute_group(self, batch: list[ICommand], seqs: list[Optional[int]], idx: list[int],
+                       results: list) -> None:
+        for i in idx:
+            results[i] = self._execute(batch[i], seqs[i])
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="command-bus")
+        return self._executor
+
+    def _track_depth(self) -> None:
+        depth = len(self._queue)
+        self._metrics.queue_depth = depth
+        if depth > self._metrics.max_queue_depth:
+            self._metrics.max_queue_depth = depth
 
+    @staticmethod
+    def _aggregate_of(cmd: ICommand) -> Any:
+        # optional on commands; those without one are free to run in any order
+        get = getattr(cmd, "get_aggregate_id", None)
+        return get() if get is not None else None
@@ -1,14 +1,28 @@
+from typing import TYPE_CHECKING, Optional
+
 from orders.models import Order
 from orders.states import CreatedState, OrderState
+from orders.stock import StockLedger
+
+if TYPE_CHECKING:
+    from orders.history import OrderHistory
 
 
 class OrderContext:
-    def __init__(self, order: Order):
+    def __init__(self, order: Order, stock: Optional[StockLedger] = None,
+                 history: Optional["OrderHistory"] = None):
         self.order = order
+        self._stock = stock
+        self._history = history
         self._state: OrderState = CreatedState()
+        if history is not None:
+            history.record(order.get_id(), None, order.get_status())
 
     def set_state(self, s: OrderState) -> None:
+        prev = self._state
         self._state = s
+        if self._history is not None and s is not prev:
+            self._history.record(self.order.get_id(), prev.get_status(), s.get_status())
 
     def pay(self) -> None:
         self._state.pay(self)
@@ -22,8 +36,23 @@ class OrderContext:
     def deliver(self) -> None:
         self._state.deliver(self)
 
+    def reserve(self) -> None:
+        self._state.reserve(self)
+
+    def release(self) -> None:
+        self._state.release(self)
+
+    def can_transition(self, action: str) -> bool:
+        return self._state.can_transition(action)
+
     def get_state(self) -> OrderState:
         return self._state
 
     def get_order(self) -> Order:
-        return self.order
\ No newline at end of file
+        return self.order
+
+    def get_stock(self) -> Optional[StockLedger]:
+        return self._stock
+
+    def get_history(self) -> Optional["OrderHistory"]:
+        return self._history
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Optional
 from orders.context import OrderContext
+from orders.stock import StockError
 
 
 class OrderHandler(ABC):
@@ -24,7 +25,12 @@ class CartValidationHandler(OrderHandler):
 
 class StockReservationHandler(OrderHandler):
     def handle(self, ctx: OrderContext) -> bool:
-        # assume stock ok
+        # without a ledger stock is assumed ok
+        if ctx.get_stock() is not None:
+            try:
+                ctx.reserve()
+            except StockError:
+                return False
         if self._next:
             return self._next.handle(ctx)
         return True
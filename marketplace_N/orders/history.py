@@ -0,0 +1,167 @@
+from array import array
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+import threading
+import time
+import uuid
+
+from orders.models import OrderStatus
+
+_STATUSES = list(OrderStatus)
+_CODES = {s: i for i, s in enumerate(_STATUSES)}
+# code stored for "no previous status" on an order's first entry
+_NONE = 255
+
+
+@dataclass(frozen=True)
+class Transition:
+    order_id: uuid.UUID
+    from_status: Optional[OrderStatus]
+    to_status: OrderStatus
+    at: float
+
+class TransitionLog:
+    # append-only and column-wise: one small int per status and a double per timestamp
+    def __init__(self):
+        self._order_ids: list[uuid.UUID] = []
+        self._from = array("B")
+        self._to = array("B")
+        self._at = array("d")
+        # order id -> row numbers of its transitions, in order
+        self._by_order: dict[uuid.UUID, array] = {}
+
+    def append(self, order_id: uuid.UUID, from_status: Optional[OrderStatus], to_status: OrderStatus,
+               at: float) -> int:
+        row = len(self._at)
+        self._order_ids.append(order_id)
+        self._from.append(_NONE if from_status is None else _CODES[from_status])
+        self._to.append(_CODES[to_status])
+        self._at.append(at)
+        rows = self._by_order.get(order_id)
+        if rows is None:
+            rows = self._by_order[order_id] = array("I")
+        rows.append(row)
+        return row
+
+    def for_order(self, order_id: uuid.UUID) -> list[Transition]:
+        return [self._row(i) for i in self._by_order.get(order_id, ())]
+
+    def __iter__(self) -> Iterator[Transition]:
+        for i in range(len(self._at)):
+            yield self._row(i)
+
+    def __len__(self) -> int:
+        return len(self._at)
+
+    def _row(self, i: int) -> Transition:
+        f = self._from[i]
+        return Transition(self._order_ids[i], None if f == _NONE else _STATUSES[f],
+                          _STATUSES[self._to[i]], self._at[i])
+
+class OrderStatusIndex:
+    # status -> time bucket -> {order id: entered at}; bucket keys per status are kept sorted
+    # so "entered before t" touches whole buckets and filters only the one straddling t
+    def __init__(self, bucket_seconds: float = 3600.0):
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be positive")
+        self._bucket_seconds = bucket_seconds
+        self._buckets: dict[OrderStatus, dict[int, dict[uuid.UUID, float]]] = {s: {} for s in OrderStatus}
+        self._keys: dict[OrderStatus, list[int]] = {s: [] for s in OrderStatus}
+        self._counts: dict[OrderStatus, int] = {s: 0 for s in OrderStatus}
+        # order id -> (status, bucket) for O(1) moves
+        self._where: dict[uuid.UUID, tuple[OrderStatus, int]] = {}
+
+    def move(self, order_id: uuid.UUID, status: OrderStatus, at: float) -> None:
+        self.remove(order_id)
+        key = int(at // self._bucket_seconds)
+        buckets = self._buckets[status]
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = {}
+            insort(self._keys[status], key)
+        bucket[order_id] = at
+        self._counts[status] += 1
+        self._where[order_id] = (status, key)
+
+    def remove(self, order_id: uuid.UUID) -> None:
+        where = self._where.pop(order_id, None)
+        if where is None:
+            return
+        status, key = where
+        buckets = self._buckets[status]
+        bucket = buckets[key]
+        del bucket[order_id]
+        self._counts[status] -= 1
+        if not bucket:
+            del buckets[key]
+            keys = self._keys[status]
+            del keys[bisect_left(keys, key)]
+
+    def get_status(self, order_id: uuid.UUID) -> Optional[OrderStatus]:
+        where = self._where.get(order_id)
+        return where[0] if where is not None else None
+
+    def count(self, status: OrderStatus) -> int:
+        return self._counts[status]
+
+    def ids_with_status(self, status: OrderStatus) -> list[uuid.UUID]:
+        buckets = self._buckets[status]
+        return [oid for key in self._keys[status] for oid in buckets[key]]
+
+    def ids_entered_before(self, status: OrderStatus, cutoff: float) -> list[uuid.UUID]:
+        buckets = self._buckets[status]
+        keys = self._keys[status]
+        last = int(cutoff // self._bucket_seconds)
+        out = []
+        for key in keys[:bisect_left(keys, last)]:
+            out.extend(buckets[key])
+        edge = buckets.get(last)
+        if edge is not None:
+            out.extend(oid for oid, at in edge.items() if at < cutoff)
+        return out
+
+    def count_entered_before(self, status: OrderStatus, cutoff: float) -> int:
+        buckets = self._buckets[status]
+        keys = self._keys[status]
+        last = int(cutoff // self._bucket_seconds)
+        n = sum(len(buckets[key]) for key in keys[:bisect_left(keys, last)])
+        edge = buckets.get(last)
+        if edge is not None:
+            n += sum(1 for at in edge.values() if at < cutoff)
+        return n
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+class OrderHistory:
+    def __init__(self, bucket_seconds: float = 3600.0, clock: Callable[[], float] = time.time):
+        self._log = TransitionLog()
+        self._index = OrderStatusIndex(bucket_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def record(self, order_id: uuid.UUID, from_status: Optional[OrderStatus], to_status: OrderStatus) -> None:
+        at = self._clock()
+        with self._lock:
+            self._log.append(order_id, from_status, to_status, at)
+            self._index.move(order_id, to_status, at)
+
+    def transitions(self, order_id: uuid.UUID) -> list[Transition]:
+        with self._lock:
+            return self._log.for_order(order_id)
+
+    def stuck(self, status: OrderStatus, older_than: float) -> list[uuid.UUID]:
+        # orders that entered status more than older_than seconds ago and are still there
+        cutoff = self._clock() - older_than
+        with self._lock:
+            return self._index.ids_entered_before(status, cutoff)
+
+    def count(self, status: OrderStatus) -> int:
+        return self._index.count(status)
+
+    def get_log(self) -> TransitionLog:
+        return self._log
+
+    def get_index(self) -> OrderStatusIndex:
+        return self._index
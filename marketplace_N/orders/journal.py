@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+import os
+import pickle
+import shutil
+import threading
+
+from events.journal import EventJournal, FsyncPolicy
+
+BEGIN = "begin"
+DONE = "done"
+UNDONE = "undone"
+ABORTED = "aborted"
+
+
+@dataclass
+class CommandRecord:
+    kind: str
+    # sequence number of the BEGIN record this one closes; None for BEGIN itself
+    ref: Optional[int] = None
+    # BEGIN holds the command as it was before execution, a successful DONE holds it after
+    command: Any = None
+    success: bool = False
+
+@dataclass
+class JournalState:
+    # commands that began but never completed, in journal order
+    pending: list[tuple[int, Any]]
+    # successful commands not undone since, oldest first
+    completed: list[tuple[int, Any]]
+
+class CommandJournal:
+    # Write-ahead log for CommandBus. A command's BEGIN record is durable before it executes.
+    # Completion records reach the OS before the result is returned and are fsynced with the
+    # next group commit, so only a machine crash can leave a finished command looking
+    # incomplete, never the other way round.
+    def __init__(self, directory: str, segment_bytes: int = 16 << 20, durable: bool = True):
+        self._dir = directory
+        self._segment_bytes = segment_bytes
+        self._durable = durable
+        self._finish_checkpoint()
+        self._journal = self._open(directory)
+        # held while appending or syncing so a checkpoint can swap the underlying journal
+        self._swap = threading.RLock()
+        self._cond = threading.Condition()
+        self._synced_to = self._journal.get_next_seq()
+        self._syncing = False
+
+    def begin(self, commands: Iterable[Any]) -> list[int]:
+        # one fsync covers the whole batch, and concurrent callers share it too
+        # serialize everything first so an unpicklable command leaves nothing half-written
+        bodies = [pickle.dumps(CommandRecord(BEGIN, command=cmd), protocol=pickle.HIGHEST_PROTOCOL)
+                  for cmd in commands]
+        with self._swap:
+            seqs = [self._journal.append_bytes(body) for body in bodies]
+        if seqs:
+            self._await_durable(seqs[-1] + 1)
+        return seqs
+
+    def complete(self, seq: int, cmd: Any, success: bool) -> None:
+        self._append(CommandRecord(DONE, seq, cmd if success else None, success))
+
+    def undone(self, seq: int) -> None:
+        self._append(CommandRecord(UNDONE, seq))
+
+    def aborted(self, seq: int) -> None:
+        self._append(CommandRecord(ABORTED, seq))
+
+    def scan(self) -> JournalState:
+        begun: dict[int, Any] = {}
+        completed: dict[int, Any] = {}
+        with self._swap:
+            records = list(self._journal.read())
+        for seq, rec in records:
+            if rec.kind == BEGIN:
+                # a BEGIN carried over by a checkpoint keeps its original sequence number in ref
+                begun[seq if rec.ref is None else rec.ref] = rec.command
+                continue
+            begun.pop(rec.ref, None)
+            if rec.kind == DONE and rec.success:
+                completed[rec.ref] = rec.command
+            else:
+                completed.pop(rec.ref, None)
+        return JournalState(list(begun.items()), list(completed.items()))
+
+    def checkpoint(self, keep_completed: int = 1024) -> None:
+        # Rewrites the journal with only unsettled BEGINs and the newest completed commands
+        # (enough to rebuild the undo history); everything else is dropped. Sequence numbers
+        # carry on from the old journal, so commands in flight can still complete.
+        with self._swap:
+            state = self.scan()
+            tmp = self._dir + ".checkpoint"
+            shutil.rmtree(tmp, ignore_errors=True)
+            fresh = self._open(tmp, self._journal.get_next_seq())
+            for seq, cmd in state.completed[-keep_completed:] if keep_completed > 0 else ():
+                fresh.append(CommandRecord(DONE, seq, cmd, True))
+            for seq, cmd in state.pending:
+                fresh.append(CommandRecord(BEGIN, seq, cmd))
+            fresh.close()
+            self._journal.close()
+            old = self._dir + ".old"
+            shutil.rmtree(old, ignore_errors=True)
+            os.rename(self._dir, old)
+            os.rename(tmp, self._dir)
+            shutil.rmtree(old)
+            self._journal = self._open(self._dir)
+        with self._cond:
+            self._synced_to = max(self._synced_to, self._journal.get_next_seq())
+
+    def sync(self) -> None:
+        self._await_durable(self._journal.get_next_seq())
+
+    def close(self) -> None:
+        with self._swap:
+            self._journal.close()
+
+    def _append(self, rec: CommandRecord) -> None:
+        with self._swap:
+            self._journal.append(rec)
+
+    def _open(self, directory: str, first_seq: int = 0) -> EventJournal:
+        # syncs are driven by group commit below rather than by the journal's own policy
+        return EventJournal(directory, self._segment_bytes,
+                            fsync=FsyncPolicy.BATCH if self._durable else FsyncPolicy.NEVER,
+                            fsync_every=1 << 62, fsync_interval=float("inf"), first_seq=first_seq)
+
+    def _finish_checkpoint(self) -> None:
+        # a crash mid-swap leaves the directory renamed away; a closed .checkpoint is complete
+        if os.path.isdir(self._dir):
+            return
+        for candidate in (self._dir + ".checkpoint", self._dir + ".old"):
+            if os.path.isdir(candidate):
+                os.rename(candidate, self._dir)
+                return
+
+    def _await_durable(self, upto: int) -> None:
+        with self._cond:
+            while self._synced_to < upto:
+                if self._syncing:
+                    self._cond.wait()
+                    continue
+                # this caller becomes the leader and syncs everything appended so far
+                self._syncing = True
+                target = self._journal.get_next_seq()
+                synced = False
+                self._cond.release()
+                try:
+                    with self._swap:
+                        self._journal.sync()
+                    synced = True
+                finally:
+                    self._cond.acquire()
+                    self._syncing = False
+                    if synced:
+                        self._synced_to = max(self._synced_to, target)
+                    self._cond.notify_all()
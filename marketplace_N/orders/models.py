@@ -1,10 +1,13 @@
 from dataclasses import dataclass
-from decimal import Decimal
 from enum import Enum
+from typing import TYPE_CHECKING, Optional
 import uuid
 
 from money import Money
 
+if TYPE_CHECKING:
+    from pricing.fx import CurrencyConverter
+
 @dataclass
 class Item:
     listing_id: uuid.UUID
@@ -29,18 +32,29 @@ class OrderStatus(Enum):
     DELIVERED = "delivered"
 
 class Order:
-    def __init__(self, items: list[Item], buyer_id: uuid.UUID):
+    def __init__(self, items: list[Item], buyer_id: uuid.UUID, currency: Optional[str] = None,
+                 converter: Optional["CurrencyConverter"] = None):
         self._id = uuid.uuid4()
         self._items = items
         self._buyer_id = buyer_id
         self._status = OrderStatus.CREATED
+        # total currency defaults to the first item's
+        self._currency = currency or (items[0].price_per_unit.currency if items else "USD")
+        self._converter = converter
         self._total = self.calculate_total()
 
     def calculate_total(self) -> Money:
-        total = Money(Decimal("0.0"), "USD")
-        for it in self._items:
-            total = total + (it.get_price_per_unit() * it.get_quantity())
-        return total
+        if not self._items:
+            return Money.zero(self._currency)
+        if self._converter is not None:
+            return self._converter.total(((it.price_per_unit, it.quantity) for it in self._items),
+                                         self._currency)
+        return Money.dot((it.price_per_unit for it in self._items),
+                         (it.quantity for it in self._items),
+                         self._currency)
+
+    def get_currency(self) -> str:
+        return self._currency
 
     def get_id(self) -> uuid.UUID:
         return self._id
@@ -58,4 +72,10 @@ class Order:
         return self._status
 
     def set_status(self, s: OrderStatus) -> None:
-        self._status = s
\ No newline at end of file
+        self._status = s
+
+    def __getstate__(self) -> dict:
+        # the converter is shared process wiring (it holds a lock); the total is already computed
+        state = self.__dict__.copy()
+        state["_converter"] = None
+        return state
\ No newline at end of file
@@ -0,0 +1,144 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+import logging
+import time
+
+from orders.context import OrderContext
+from orders.handlers import (CartValidationHandler, FraudCheckHandler, OrderHandler,
+                             PaymentValidationHandler, StockReservationHandler)
+from orders.states import ReservedState
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageResult:
+    name: str
+    ok: bool
+    duration: float
+    error: Optional[BaseException] = None
+
+@dataclass
+class PipelineResult:
+    ok: bool
+    failed_stage: Optional[str] = None
+    stages: dict[str, StageResult] = field(default_factory=dict)
+    # stages that never ran because an earlier failure short-circuited the run
+    cancelled: list[str] = field(default_factory=list)
+    # succeeded stages whose side effects were undone because the run failed
+    compensated: list[str] = field(default_factory=list)
+
+class ValidationPipeline:
+    def __init__(self, workers: int = 4):
+        self._workers = workers
+        self._stages: dict[str, tuple[OrderHandler, tuple[str, ...]]] = {}
+        self._compensations: dict[str, Callable[[OrderContext], None]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def add_stage(self, name: str, handler: OrderHandler, depends_on: Iterable[str] = (),
+                  compensate: Optional[Callable[[OrderContext], None]] = None) -> "ValidationPipeline":
+        deps = tuple(depends_on)
+        # dependencies must already be declared, which keeps the graph acyclic
+        for d in deps:
+            if d not in self._stages:
+                raise KeyError(f"Unknown dependency {d} for stage {name}")
+        if name in self._stages:
+            raise KeyError(f"Stage {name} already declared")
+        self._stages[name] = (handler, deps)
+        if compensate is not None:
+            self._compensations[name] = compensate
+        return self
+
+    def run(self, ctx: OrderContext) -> PipelineResult:
+        return self.run_batch([ctx])[0]
+
+    def run_batch(self, contexts: Iterable[OrderContext]) -> list[PipelineResult]:
+        contexts = list(contexts)
+        results = [PipelineResult(ok=True) for _ in contexts]
+        pending: dict[Future, tuple[int, str]] = {}
+        # per context: stages still waiting on dependencies
+        waiting = [dict(self._stages) for _ in contexts]
+        executor = self._get_executor()
+
+        def submit_ready(i: int) -> None:
+            done = results[i].stages
+            for name, (handler, deps) in list(waiting[i].items()):
+                if all(d in done for d in deps):
+                    del waiting[i][name]
+                    pending[executor.submit(self._run_stage, name, handler, contexts[i])] = (i, name)
+
+        for i in range(len(contexts)):
+            submit_ready(i)
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                i, name = pending.pop(fut)
+                if fut.cancelled():
+                    continue
+                stage = fut.result()
+                result = results[i]
+                result.stages[name] = stage
+                if not result.ok:
+                    # a sibling already failed; late finishers are recorded but change nothing
+                    continue
+                if stage.ok:
+                    submit_ready(i)
+                    continue
+                result.ok = False
+                result.failed_stage = name
+                for other, (j, other_name) in list(pending.items()):
+                    if j == i and other.cancel():
+                        pending.pop(other)
+                        result.cancelled.append(other_name)
+                result.cancelled.extend(waiting[i])
+                waiting[i].clear()
+        # every stage has finished by now, including ones that outlived a sibling's failure
+        for ctx, result in zip(contexts, results):
+            if not result.ok:
+                self._compensate(ctx, result)
+        return results
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="order-validation")
+        return self._executor
+
+    def _compensate(self, ctx: OrderContext, result: PipelineResult) -> None:
+        for name in reversed(list(result.stages)):
+            compensate = self._compensations.get(name)
+            if compensate is None or not result.stages[name].ok:
+                continue
+            try:
+                compensate(ctx)
+                result.compensated.append(name)
+            except Exception:
+                logger.exception("Compensation for stage %s failed", name)
+
+    @staticmethod
+    def _run_stage(name: str, handler: OrderHandler, ctx: OrderContext) -> StageResult:
+        started = time.perf_counter()
+        try:
+            ok = bool(handler.handle(ctx))
+            return StageResult(name, ok, time.perf_counter() - started)
+        except Exception as e:
+            return StageResult(name, False, time.perf_counter() - started, e)
+
+def release_reservation(ctx: OrderContext) -> None:
+    # a sibling stage failed: hand the stock back but leave the order open for a retry
+    if ctx.get_state() is ReservedState():
+        ctx.release()
+
+def default_validation_pipeline(workers: int = 4) -> ValidationPipeline:
+    # stock, payment and fraud only need a valid cart and don't depend on each other
+    return (ValidationPipeline(workers)
+            .add_stage("cart", CartValidationHandler())
+            .add_stage("stock", StockReservationHandler(), depends_on=("cart",),
+                       compensate=release_reservation)
+            .add_stage("payment", PaymentValidationHandler(), depends_on=("cart",))
+            .add_stage("fraud", FraudCheckHandler(), depends_on=("cart",)))
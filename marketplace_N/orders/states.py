@@ -1,111 +1,182 @@
-from abc import ABC, abstractmethod
-from typing import Any
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
 from orders.models import OrderStatus
-    
+from orders.stock import ReservationExpiredError, StockError
 
-class OrderState(ABC):
-    def __init__(self, name: str):
-        self._name = name
+ACTIONS = ("pay", "cancel", "ship", "deliver", "reserve", "release")
 
-    def get_name(self) -> str:
-        return self._name
 
-    @abstractmethod
-    def pay(self, context: Any) -> None: ...
+class OrderStateError(Exception):
+    pass
 
-    @abstractmethod
-    def cancel(self, context: Any) -> None: ...
+class InvalidTransitionError(OrderStateError):
+    def __init__(self, state: str, action: str):
+        super().__init__(f"Can't {action} an order in state {state}")
+        self.state = state
+        self.action = action
 
-    @abstractmethod
-    def ship(self, context: Any) -> None: ...
+class OrderState:
+    # States are stateless flyweights: constructing one returns the shared instance, and the
+    # transitions each state allows are compiled from _TRANSITIONS below.
+    name = ""
+    status = OrderStatus.CREATED
+    _instance: Optional["OrderState"] = None
+    # action -> (next state or None to stay put, hook run before the move)
+    _moves: dict[str, tuple[Optional["OrderState"], Optional[Callable[[Any], None]]]] = {}
 
-    @abstractmethod
-    def deliver(self, context: Any) -> None: ...
+    def __new__(cls):
+        if cls.__dict__.get("_instance") is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
 
-class CreatedState(OrderState):
-    def __init__(self):
-        super().__init__("created")
+    def get_name(self) -> str:
+        return self.name
 
-    def pay(self, context: Any) -> None:
-        context.order.set_status(OrderStatus.PAID)
-        context.set_state(PaidState())
+    def get_status(self) -> OrderStatus:
+        return self.status
 
-    def cancel(self, context: Any) -> None:
-        context.order.set_status(OrderStatus.CANCELLED)
-        context.set_state(CancelledState())
+    def can_transition(self, action: str) -> bool:
+        return action in self._moves
 
-    def ship(self, context: Any) -> None:
-        raise Exception("Can't ship before payment")
-
-    def deliver(self, context: Any) -> None:
-        raise Exception("Can't deliver before shipping")
-
-class PaidState(OrderState):
-    def __init__(self):
-        super().__init__("paid")
+    def apply(self, action: str, context: Any) -> None:
+        move = self._moves.get(action)
+        if move is None:
+            raise InvalidTransitionError(self.name, action)
+        target, hook = move
+        if hook is not None:
+            hook(context)
+        if target is not None:
+            context.order.set_status(target.status)
+            context.set_state(target)
 
     def pay(self, context: Any) -> None:
-        pass
+        self.apply("pay", context)
 
     def cancel(self, context: Any) -> None:
-        context.order.set_status(OrderStatus.CANCELLED)
-        context.set_state(CancelledState())
+        self.apply("cancel", context)
 
     def ship(self, context: Any) -> None:
-        context.order.set_status(OrderStatus.SHIPPED)
-        context.set_state(ShippedState())
+        self.apply("ship", context)
 
     def deliver(self, context: Any) -> None:
-        raise Exception("Can't deliver before shipping")
-
-class ReservedState(OrderState):
-    def __init__(self):
-        super().__init__("reserved")
-
-    def pay(self, context: Any) -> None:
-        context.order.set_status(OrderStatus.PAID)
-        context.set_state(PaidState())
+        self.apply("deliver", context)
 
-    def cancel(self, context: Any) -> None:
-        context.order.set_status(OrderStatus.CANCELLED)
-        context.set_state(CancelledState())
+    def reserve(self, context: Any) -> None:
+        self.apply("reserve", context)
 
-    def ship(self, context: Any) -> None:
-        context.order.set_status(OrderStatus.SHIPPED)
-        context.set_state(ShippedState())
+    def release(self, context: Any) -> None:
+        self.apply("release", context)
 
-    def deliver(self, context: Any) -> None:
-        raise Exception("Can't deliver before shipping")
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
 
-class ShippedState(OrderState):
-    def __init__(self):
-        super().__init__("shipped")
+class CreatedState(OrderState):
+    name = "created"
+    status = OrderStatus.CREATED
 
-    def pay(self, context: Any) -> None:
-        pass
+class PaidState(OrderState):
+    name = "paid"
+    status = OrderStatus.PAID
 
-    def cancel(self, context: Any) -> None:
-        raise Exception("Can't cancel after shipped")
+class ReservedState(OrderState):
+    name = "reserved"
+    status = OrderStatus.RESERVED
 
-    def ship(self, context: Any) -> None:
-        pass
+class ShippedState(OrderState):
+    name = "shipped"
+    status = OrderStatus.SHIPPED
 
-    def deliver(self, context: Any) -> None:
-        context.order.set_status(OrderStatus.DELIVERED)
-        context.set_state(self)
+class DeliveredState(OrderState):
+    name = "delivered"
+    status = OrderStatus.DELIVERED
 
 class CancelledState(OrderState):
-    def __init__(self):
-        super().__init__("cancelled")
-
-    def pay(self, context: Any) -> None:
-        raise Exception("Can't pay cancelled order")
-
-    def cancel(self, context: Any) -> None:
-        pass
-
-    def ship(self, context: Any) -> None:
-        raise Exception("Can't ship cancelled order")
-
-    def deliver(self, context: Any) -> None:
-        raise Exception("Can't deliver cancelled order")
\ No newline at end of file
+    name = "cancelled"
+    status = OrderStatus.CANCELLED
+
+def _reserve_stock(context: Any) -> None:
+    stock = context.get_stock()
+    if stock is None:
+        raise StockError("No stock ledger attached to the order")
+    stock.reserve(context.order.get_id(), context.order.get_items())
+
+def _commit_stock(context: Any) -> None:
+    stock = context.get_stock()
+    # a reservation that lapsed has already gone back on sale
+    if stock is not None and not stock.commit(context.order.get_id()):
+        raise ReservationExpiredError(f"Reservation for order {context.order.get_id()} expired")
+
+def _hold_stock(context: Any) -> None:
+    stock = context.get_stock()
+    if stock is not None and not stock.hold(context.order.get_id()):
+        raise ReservationExpiredError(f"Reservation for order {context.order.get_id()} expired")
+
+def _ship_held_stock(context: Any) -> None:
+    # orders paid without reserving hold nothing, and a paid hold never expires
+    stock = context.get_stock()
+    if stock is not None:
+        stock.commit(context.order.get_id())
+
+def _release_stock(context: Any) -> None:
+    stock = context.get_stock()
+    if stock is not None:
+        stock.release(context.order.get_id())
+
+_STAY = None
+# (state, action) -> (next state class or _STAY, hook); anything missing is an invalid move
+_TRANSITIONS: dict[tuple[type, str], tuple[Optional[type], Optional[Callable[[Any], None]]]] = {
+    (CreatedState, "pay"): (PaidState, None),
+    (CreatedState, "cancel"): (CancelledState, None),
+    (CreatedState, "reserve"): (ReservedState, _reserve_stock),
+    (PaidState, "pay"): (_STAY, None),
+    (PaidState, "cancel"): (CancelledState, _release_stock),
+    (PaidState, "ship"): (ShippedState, _ship_held_stock),
+    (ReservedState, "pay"): (PaidState, _hold_stock),
+    (ReservedState, "cancel"): (CancelledState, _release_stock),
+    (ReservedState, "ship"): (ShippedState, _commit_stock),
+    (ReservedState, "reserve"): (_STAY, None),
+    # gives the stock back without giving up on the order; it can be reserved again
+    (ReservedState, "release"): (CreatedState, _release_stock),
+    (ShippedState, "pay"): (_STAY, None),
+    (ShippedState, "ship"): (_STAY, None),
+    (ShippedState, "deliver"): (DeliveredState, None),
+    (DeliveredState, "pay"): (_STAY, None),
+    (DeliveredState, "ship"): (_STAY, None),
+    (DeliveredState, "deliver"): (_STAY, None),
+    (CancelledState, "cancel"): (_STAY, None),
+}
+
+def _compile() -> None:
+    for cls in (CreatedState, PaidState, ReservedState, ShippedState, DeliveredState, CancelledState):
+        cls._moves = {}
+    for (cls, action), (target, hook) in _TRANSITIONS.items():
+        cls._moves[action] = (target() if target is not None else None, hook)
+
+_compile()
+
+@dataclass
+class BulkTransitionResult:
+    moved: list[Any] = field(default_factory=list)
+    # contexts whose state was not among from_states
+    skipped: list[Any] = field(default_factory=list)
+    failed: list[tuple[Any, Exception]] = field(default_factory=list)
+
+def bulk_transition(contexts: Iterable[Any], action: str,
+                    from_states: Optional[Iterable[OrderState]] = None) -> BulkTransitionResult:
+    # one pass over the batch; a failing context is reported and the rest carry on
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action {action}")
+    allowed = set(from_states) if from_states is not None else None
+    result = BulkTransitionResult()
+    for ctx in contexts:
+        state = ctx.get_state()
+        if allowed is not None and state not in allowed:
+            result.skipped.append(ctx)
+            continue
+        try:
+            state.apply(action, ctx)
+        except (OrderStateError, StockError) as e:
+            result.failed.append((ctx, e))
+            continue
+        result.moved.append(ctx)
+    return result
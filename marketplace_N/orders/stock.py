@@ -0,0 +1,189 @@
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+import heapq
+import threading
+import time
+import uuid
+
+from orders.models import Item
+
+
+class StockError(Exception):
+    pass
+
+class InsufficientStockError(StockError):
+    def __init__(self, listing_id: uuid.UUID, requested: int, available: int):
+        super().__init__(f"Insufficient stock for {listing_id}: requested {requested}, available {available}")
+        self.listing_id = listing_id
+        self.requested = requested
+        self.available = available
+
+class ReservationExpiredError(StockError):
+    pass
+
+@dataclass
+class Reservation:
+    order_id: uuid.UUID
+    lines: dict[uuid.UUID, int]
+    expires_at: Optional[float]
+
+    def get_lines(self) -> dict[uuid.UUID, int]:
+        return dict(self.lines)
+
+class StockLedger:
+    # Per-listing counters are guarded by a fixed set of striped locks, so reservations on
+    # different SKUs rarely contend. Multi-item reservations take their stripes in index order
+    # to stay deadlock-free.
+    def __init__(self, stripes: int = 64, reservation_ttl: Optional[float] = 900.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if stripes <= 0:
+            raise ValueError("stripes must be positive")
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._available: dict[uuid.UUID, int] = {}
+        self._reserved: dict[uuid.UUID, int] = {}
+        self._ttl = reservation_ttl
+        self._clock = clock
+        # None marks an order whose reserve() is still taking stock
+        self._reservations: dict[uuid.UUID, Optional[Reservation]] = {}
+        # (expires_at, order_id); stale entries are skipped when popped
+        self._expiry: list[tuple[float, uuid.UUID]] = []
+        self._res_lock = threading.Lock()
+
+    def set_stock(self, listing_id: uuid.UUID, quantity: int) -> None:
+        if quantity < 0:
+            raise ValueError("quantity must be non-negative")
+        with self._stripe(listing_id):
+            self._available[listing_id] = quantity
+
+    def add_stock(self, listing_id: uuid.UUID, quantity: int) -> int:
+        with self._stripe(listing_id):
+            left = self._available.get(listing_id, 0) + quantity
+            if left < 0:
+                raise InsufficientStockError(listing_id, -quantity, left - quantity)
+            self._available[listing_id] = left
+            return left
+
+    def get_available(self, listing_id: uuid.UUID) -> int:
+        return self._available.get(listing_id, 0)
+
+    def get_reserved(self, listing_id: uuid.UUID) -> int:
+        return self._reserved.get(listing_id, 0)
+
+    def get_reservation(self, order_id: uuid.UUID) -> Optional[Reservation]:
+        return self._reservations.get(order_id)
+
+    def reserve(self, order_id: uuid.UUID, items: Iterable[Item], ttl: Optional[float] = None) -> Reservation:
+        # all-or-nothing: either every line is held or nothing changes
+        self.release_expired()
+        lines: dict[uuid.UUID, int] = {}
+        for it in items:
+            if it.quantity <= 0:
+                raise ValueError(f"Invalid quantity {it.quantity} for {it.listing_id}")
+            lines[it.listing_id] = lines.get(it.listing_id, 0) + it.quantity
+        with self._res_lock:
+            if order_id in self._reservations:
+                raise StockError(f"Order {order_id} already holds a reservation")
+            # claimed under the lock so a concurrent reserve for the same order fails above
+            self._reservations[order_id] = None
+        locks = self._locks_for(lines)
+        for lock in locks:
+            lock.acquire()
+        try:
+            for listing_id, qty in lines.items():
+                available = self._available.get(listing_id, 0)
+                if available < qty:
+                    raise InsufficientStockError(listing_id, qty, available)
+            for listing_id, qty in lines.items():
+                self._available[listing_id] -= qty
+                self._reserved[listing_id] = self._reserved.get(listing_id, 0) + qty
+        except BaseException:
+            with self._res_lock:
+                del self._reservations[order_id]
+            raise
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        ttl = self._ttl if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        reservation = Reservation(order_id, lines, expires_at)
+        with self._res_lock:
+            self._reservations[order_id] = reservation
+            if expires_at is not None:
+                heapq.heappush(self._expiry, (expires_at, order_id))
+        return reservation
+
+    def release(self, order_id: uuid.UUID) -> bool:
+        # puts held stock back on sale
+        reservation = self._take(order_id)
+        if reservation is None:
+            return False
+        self._settle(reservation, restock=True)
+        return True
+
+    def hold(self, order_id: uuid.UUID) -> bool:
+        # the order was paid: its reservation stops expiring and is held until it ships or is cancelled
+        with self._res_lock:
+            reservation = self._reservations.get(order_id)
+            if reservation is None:
+                return False
+            if reservation.expires_at is None or reservation.expires_at > self._clock():
+                # the expiry heap entry goes stale and is skipped when popped
+                reservation.expires_at = None
+                return True
+            del self._reservations[order_id]
+        # lapsed but not swept yet: it goes back on sale instead
+        self._settle(reservation, restock=True)
+        return False
+
+    def commit(self, order_id: uuid.UUID) -> bool:
+        # the order shipped: held stock leaves the ledger for good
+        reservation = self._take(order_id)
+        if reservation is None:
+            return False
+        if reservation.expires_at is not None and reservation.expires_at <= self._clock():
+            # lapsed but not swept yet: it goes back on sale instead
+            self._settle(reservation, restock=True)
+            return False
+        self._settle(reservation, restock=False)
+        return True
+
+    def release_expired(self) -> list[uuid.UUID]:
+        now = self._clock()
+        expired = []
+        with self._res_lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                expires_at, order_id = heapq.heappop(self._expiry)
+                reservation = self._reservations.get(order_id)
+                if reservation is not None and reservation.expires_at == expires_at:
+                    del self._reservations[order_id]
+                    expired.append(reservation)
+        for reservation in expired:
+            self._settle(reservation, restock=True)
+        return [r.order_id for r in expired]
+
+    def _take(self, order_id: uuid.UUID) -> Optional[Reservation]:
+        with self._res_lock:
+            if self._reservations.get(order_id) is None:
+                # unknown, or a reserve() still in progress that isn't ours to settle
+                return None
+            return self._reservations.pop(order_id)
+
+    def _settle(self, reservation: Reservation, restock: bool) -> None:
+        locks = self._locks_for(reservation.lines)
+        for lock in locks:
+            lock.acquire()
+        try:
+            for listing_id, qty in reservation.lines.items():
+                self._reserved[listing_id] -= qty
+                if restock:
+                    self._available[listing_id] = self._available.get(listing_id, 0) + qty
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _stripe(self, listing_id: uuid.UUID) -> threading.Lock:
+        return self._locks[hash(listing_id) % len(self._locks)]
+
+    def _locks_for(self, listing_ids: Iterable[uuid.UUID]) -> list[threading.Lock]:
+        n = len(self._locks)
+        return [self._locks[i] for i in sorted({hash(l) % n for l in listing_ids})]
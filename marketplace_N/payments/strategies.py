@@ -1,8 +1,11 @@
-from typing import Any, Optional, Protocol
+from typing import TYPE_CHECKING, Any, Optional, Protocol
 
 from orders.models import Order
 from payments.gateways import IPaymentGateway
 
+if TYPE_CHECKING:
+    from idempotency import IdempotencyStore
+
 
 class PaymentResult:
     def __init__(self, success: bool, tx_id: Optional[str] = None, message: str = ""):
@@ -13,26 +16,37 @@ class PaymentResult:
 class IPaymentStrategy(Protocol):
     def execute_payment(self, order: Order, payment_data: dict[str, Any]) -> PaymentResult: ...
 
+def _authorize(kind: str, gateway: IPaymentGateway, idempotency: Optional["IdempotencyStore"],
+               order: Order, payment_data: dict[str, Any]) -> PaymentResult:
+    def call() -> PaymentResult:
+        resp = gateway.authorize(order.get_total(), payment_data)
+        return PaymentResult(resp.success, resp.tx_id, resp.message)
+
+    key = payment_data.get("idempotency_key")
+    if idempotency is None or key is None:
+        return call()
+    return idempotency.execute((kind, "authorize", key), call)
+
 class StripeStrategy:
-    def __init__(self, gateway: IPaymentGateway):
+    def __init__(self, gateway: IPaymentGateway, idempotency: Optional["IdempotencyStore"] = None):
         self.gateway = gateway
+        self.idempotency = idempotency
 
     def execute_payment(self, order: Order, payment_data: dict[str, Any]) -> PaymentResult:
-        resp = self.gateway.authorize(order.get_total(), payment_data)
-        return PaymentResult(resp.success, resp.tx_id, resp.message)
+        return _authorize(type(self).__name__, self.gateway, self.idempotency, order, payment_data)
 
 class PayPalStrategy:
-    def __init__(self, gateway: IPaymentGateway):
+    def __init__(self, gateway: IPaymentGateway, idempotency: Optional["IdempotencyStore"] = None):
         self.gateway = gateway
+        self.idempotency = idempotency
 
     def execute_payment(self, order: Order, payment_data: dict[str, Any]) -> PaymentResult:
-        resp = self.gateway.authorize(order.get_total(), payment_data)
-        return PaymentResult(resp.success, resp.tx_id, resp.message)
+        return _authorize(type(self).__name__, self.gateway, self.idempotency, order, payment_data)
 
 class BankStrategy:
-    def __init__(self, gateway: IPaymentGateway):
+    def __init__(self, gateway: IPaymentGateway, idempotency: Optional["IdempotencyStore"] = None):
         self.gateway = gateway
+        self.idempotency = idempotency
 
     def execute_payment(self, order: Order, payment_data: dict[str, Any]) -> PaymentResult:
-        resp = self.gateway.authorize(order.get_total(), payment_data)
-        return PaymentResult(resp.success, resp.tx_id, resp.message)
\ No newline at end of file
+        return _authorize(type(self).__name__, self.gateway, self.idempotency, order, payment_data)
@@ -0,0 +1,138 @@
+from concurrent.futures import ProcessPoolExecutor
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import TYPE_CHECKING, Any, Optional, Protocol, Sequence
+
+from listings.models import Listing
+from money import Money, to_minor
+
+if TYPE_CHECKING:
+    from pricing.calculators import IPriceCalculator
+    from pricing.fx import RateSnapshot
+
+
+# Stages work on parallel lists of minor-unit ints and currency codes. Each one reproduces
+# its calculator's scalar rounding exactly, so batch and per-listing results are identical.
+class IBatchStage(Protocol):
+    def apply(self, minors: list[int], currencies: list[str]) -> list[int]: ...
+
+# stages whose result depends on the listing itself (not just its amount) set needs_listings
+class IListingBatchStage(Protocol):
+    needs_listings: bool
+
+    def apply_listings(self, minors: list[int], currencies: list[str],
+                       listings: Sequence[Listing]) -> list[int]: ...
+
+class BasePriceStage:
+    def load(self, listings: Sequence[Listing]) -> tuple[list[int], list[str]]:
+        minors: list[int] = []
+        currencies: list[str] = []
+        for listing in listings:
+            p = listing.payload.get("price")
+            if isinstance(p, str):
+                cur = listing.payload.get("currency", "USD")
+                minors.append(to_minor(p, cur))
+                currencies.append(cur)
+            elif isinstance(p, Money):
+                minors.append(p.minor_units)
+                currencies.append(p.currency)
+            else:
+                minors.append(0)
+                currencies.append("USD")
+        return minors, currencies
+
+class DiscountStage:
+    def __init__(self, discount: Decimal):
+        self._discount = discount
+        self._per_currency: dict[str, int] = {}
+
+    def apply(self, minors: list[int], currencies: list[str]) -> list[int]:
+        per_currency = self._per_currency
+        out = []
+        for m, cur in zip(minors, currencies):
+            d = per_currency.get(cur)
+            if d is None:
+                d = per_currency[cur] = to_minor(self._discount, cur)
+            out.append(m - d)
+        return out
+
+class ScaleStage:
+    # multiply by an exact rational num/den and round half-even, integer math only
+    def __init__(self, factor: Decimal):
+        self._num, self._den = factor.as_integer_ratio()
+
+    def apply(self, minors: list[int], currencies: list[str]) -> list[int]:
+        num, den = self._num, self._den
+        out = []
+        for m in minors:
+            q, r = divmod(m * num, den)
+            twice = 2 * r
+            if twice > den or (twice == den and q & 1):
+                q += 1
+            out.append(q)
+        return out
+
+class ConvertStage:
+    def __init__(self, snapshot: "RateSnapshot", currency: str):
+        self._snapshot = snapshot
+        self._currency = currency
+
+    def apply(self, minors: list[int], currencies: list[str]) -> list[int]:
+        out = []
+        for i, (m, cur) in enumerate(zip(minors, currencies)):
+            if cur != self._currency:
+                factor = self._snapshot.minor_factor(cur, self._currency)
+                m = int((m * factor).to_integral_value(rounding=ROUND_HALF_EVEN))
+                currencies[i] = self._currency
+            out.append(m)
+        return out
+
+class PricePipeline:
+    def __init__(self, base: BasePriceStage, stages: list[IBatchStage]):
+        self._base = base
+        self._stages = stages
+
+    def run(self, listings: Sequence[Listing]) -> list[tuple[int, str]]:
+        minors, currencies = self._base.load(listings)
+        for stage in self._stages:
+            if getattr(stage, "needs_listings", False):
+                minors = stage.apply_listings(minors, currencies, listings)
+            else:
+                minors = stage.apply(minors, currencies)
+        return list(zip(minors, currencies))
+
+def compile_pipeline(calc: "IPriceCalculator", ctx: dict[str, Any]) -> Optional[PricePipeline]:
+    # unwraps the decorator chain; None if any layer has no batch stage
+    stages = []
+    node = calc
+    while True:
+        stage_fn = getattr(node, "batch_stage", None)
+        if stage_fn is None:
+            return None
+        stage = stage_fn(ctx)
+        if isinstance(stage, BasePriceStage):
+            break
+        if stage is not None:
+            stages.append(stage)
+        node = node._next
+    stages.reverse()
+    return PricePipeline(stage, stages)
+
+def _run_chunk(pipeline: PricePipeline, listings: Sequence[Listing]) -> list[tuple[int, str]]:
+    return pipeline.run(listings)
+
+def calculate_batch(calc: "IPriceCalculator", listings: Sequence[Listing], ctx: dict[str, Any],
+                    chunk_size: int = 50_000, workers: Optional[int] = None) -> list[Money]:
+    pipeline = compile_pipeline(calc, ctx)
+    if pipeline is None:
+        return [calc.calculate(l, ctx) for l in listings]
+    listings = list(listings)
+    if workers is None or workers <= 1 or len(listings) <= chunk_size:
+        rows = pipeline.run(listings)
+    else:
+        chunks = [listings[i:i + chunk_size] for i in range(0, len(listings), chunk_size)]
+        rows = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(_run_chunk, [pipeline] * len(chunks), chunks):
+                rows.extend(part)
+    from_minor = Money.from_minor
+    return [from_minor(m, cur) for m, cur in rows]
@@ -1,14 +1,26 @@
 from decimal import Decimal
-from typing import Any, Protocol
+from typing import Any, Optional, Protocol, Sequence
 
 from listings.models import Listing
 from money import Money
+from pricing.batch import BasePriceStage, ConvertStage, DiscountStage, IBatchStage, ScaleStage, calculate_batch
+from pricing.fx import CurrencyConverter
 
 
 class IPriceCalculator(Protocol):
     def calculate(self, listing: Listing, ctx: dict[str, Any]) -> Money: ...
 
-class BasePriceCalculator:
+    def calculate_batch(self, listings: Sequence[Listing], ctx: dict[str, Any],
+                        chunk_size: int = 50_000, workers: Optional[int] = None) -> list[Money]:
+        return calculate_batch(self, listings, ctx, chunk_size, workers)
+
+class BasePriceCalculator(IPriceCalculator):
+    def quote_key(self, ctx: dict[str, Any]) -> tuple:
+        return ("base",)
+
+    def batch_stage(self, ctx: dict[str, Any]) -> IBatchStage:
+        return BasePriceStage()
+
     def calculate(self, listing: Listing, ctx: dict[str, Any]) -> Money:
         # assume 'price' is in payload
         p = listing.payload.get("price")
@@ -16,36 +28,72 @@ class BasePriceCalculator:
             return Money(Decimal(p), listing.payload.get("currency", "USD"))
         if isinstance(p, Money):
             return p
-        return Money(Decimal("0.0"), "USD")
+        return Money.zero("USD")
 
 class PromotionDecorator(IPriceCalculator):
     def __init__(self, next_calc: IPriceCalculator):
         self._next = next_calc
 
+    def quote_key(self, ctx: dict[str, Any]) -> tuple:
+        return ("promotion", ctx.get("promotion_discount"))
+
+    def batch_stage(self, ctx: dict[str, Any]) -> Optional[IBatchStage]:
+        discount = ctx.get("promotion_discount", Decimal("0.0"))
+        return DiscountStage(discount) if isinstance(discount, Decimal) else None
+
     def calculate(self, listing: Listing, ctx: dict[str, Any]) -> Money:
         base = self._next.calculate(listing, ctx)
         discount = ctx.get("promotion_discount", Decimal("0.0"))
         if isinstance(discount, Decimal):
-            return Money(base.amount - discount, base.currency)
+            return base - Money(discount, base.currency)
         return base
 
 class TaxDecorator(IPriceCalculator):
     def __init__(self, next_calc: IPriceCalculator, tax_rate: float):
         self._next = next_calc
         self.tax_rate = Decimal(str(tax_rate))
+        self._factor = Decimal("1.0") + self.tax_rate
+
+    def quote_key(self, ctx: dict[str, Any]) -> tuple:
+        return ("tax", self.tax_rate)
+
+    def batch_stage(self, ctx: dict[str, Any]) -> Optional[IBatchStage]:
+        return ScaleStage(self._factor)
 
     def calculate(self, listing: Listing, ctx: dict[str, Any]) -> Money:
         base = self._next.calculate(listing, ctx)
-        taxed = base.amount * (Decimal("1.0") + self.tax_rate)
-        return Money(taxed, base.currency)
+        return base.multiply(self._factor)
 
 class LoyaltyDecorator(IPriceCalculator):
     def __init__(self, next_calc: IPriceCalculator, loyalty_level: str):
         self._next = next_calc
         self.loyalty_level = loyalty_level
 
+    def quote_key(self, ctx: dict[str, Any]) -> tuple:
+        return ("loyalty", self.loyalty_level)
+
+    def batch_stage(self, ctx: dict[str, Any]) -> Optional[IBatchStage]:
+        return ScaleStage(Decimal("0.9")) if self.loyalty_level == "GOLD" else None
+
     def calculate(self, listing: Listing, ctx: dict[str, Any]) -> Money:
         base = self._next.calculate(listing, ctx)
         if self.loyalty_level == "GOLD":
-            return Money(base.amount * Decimal("0.9"), base.currency)
-        return base
\ No newline at end of file
+            return base.multiply(Decimal("0.9"))
+        return base
+
+class CurrencyDecorator(IPriceCalculator):
+    def __init__(self, next_calc: IPriceCalculator, converter: CurrencyConverter, currency: str = "USD"):
+        self._next = next_calc
+        self._converter = converter
+        self.currency = currency
+
+    def quote_key(self, ctx: dict[str, Any]) -> tuple:
+        # a new rate snapshot changes every converted quote
+        return ("currency", ctx.get("currency", self.currency), self._converter.get_version())
+
+    def batch_stage(self, ctx: dict[str, Any]) -> Optional[IBatchStage]:
+        return ConvertStage(self._converter.snapshot(), ctx.get("currency", self.currency))
+
+    def calculate(self, listing: Listing, ctx: dict[str, Any]) -> Money:
+        base = self._next.calculate(listing, ctx)
+        return self._converter.convert(base, ctx.get("currency", self.currency))
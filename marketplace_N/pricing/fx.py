@@ -0,0 +1,138 @@
+from decimal import Decimal
+from typing import Callable, Iterable, Optional, Protocol
+import json
+import logging
+import os
+import threading
+import time
+
+from money import DEFAULT_ROUNDING, Money, currency_exponent
+
+logger = logging.getLogger(__name__)
+
+class RateSnapshot:
+    def __init__(self, version: int, base: str, rates: dict[str, Decimal], loaded_at: float):
+        self.version = version
+        self.base = base
+        # units of each currency per one unit of base
+        self.rates = dict(rates)
+        self.rates[base] = Decimal(1)
+        self.loaded_at = loaded_at
+        self._cross: dict[tuple[str, str], Decimal] = {}
+        self._minor_factors: dict[tuple[str, str], Decimal] = {}
+
+    def rate(self, src: str, dst: str) -> Decimal:
+        if src == dst:
+            return Decimal(1)
+        key = (src, dst)
+        r = self._cross.get(key)
+        if r is None:
+            if src not in self.rates or dst not in self.rates:
+                raise KeyError(f"No rate for {src}->{dst}")
+            r = self.rates[dst] / self.rates[src]
+            self._cross[key] = r
+        return r
+
+    def minor_factor(self, src: str, dst: str) -> Decimal:
+        # multiply a src minor-unit count by this to get dst minor units
+        key = (src, dst)
+        f = self._minor_factors.get(key)
+        if f is None:
+            f = self.rate(src, dst).scaleb(currency_exponent(dst) - currency_exponent(src))
+            self._minor_factors[key] = f
+        return f
+
+class IRateSource(Protocol):
+    def load(self) -> Optional[tuple[str, dict[str, Decimal]]]: ...
+
+class StaticRateSource:
+    def __init__(self, base: str, rates: dict[str, Decimal]):
+        self._base = base
+        self._rates = rates
+
+    def load(self) -> Optional[tuple[str, dict[str, Decimal]]]:
+        return self._base, self._rates
+
+class FileRateSource:
+    # JSON file: {"base": "USD", "rates": {"EUR": "0.92", ...}}; stand-in for a rates feed
+    def __init__(self, path: str):
+        self._path = path
+        self._mtime: Optional[float] = None
+
+    def load(self) -> Optional[tuple[str, dict[str, Decimal]]]:
+        mtime = os.stat(self._path).st_mtime
+        if mtime == self._mtime:
+            return None
+        with open(self._path) as f:
+            data = json.load(f)
+        self._mtime = mtime
+        return data["base"], {cur: Decimal(str(r)) for cur, r in data["rates"].items()}
+
+class CurrencyConverter:
+    def __init__(self, source: IRateSource, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self._source = source
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._snapshot: Optional[RateSnapshot] = None
+        self.refresh()
+
+    def snapshot(self) -> RateSnapshot:
+        snap = self._snapshot
+        if snap is None or self._clock() - snap.loaded_at >= self._ttl:
+            snap = self.refresh()
+        return snap
+
+    def refresh(self) -> RateSnapshot:
+        with self._lock:
+            now = self._clock()
+            try:
+                loaded = self._source.load()
+            except Exception:
+                if self._snapshot is None:
+                    raise
+                # a broken feed keeps the last good rates; try again after another ttl
+                logger.exception("Rate refresh failed, serving version %d", self._snapshot.version)
+                self._snapshot.loaded_at = now
+                return self._snapshot
+            if self._snapshot is not None and (loaded is None or self._same(loaded)):
+                # source unchanged: keep the snapshot and its memoized cross rates
+                self._snapshot.loaded_at = now
+                return self._snapshot
+            base, rates = loaded
+            version = self._snapshot.version + 1 if self._snapshot is not None else 1
+            self._snapshot = RateSnapshot(version, base, rates, now)
+            return self._snapshot
+
+    def rate(self, src: str, dst: str) -> Decimal:
+        return self.snapshot().rate(src, dst)
+
+    def get_version(self) -> int:
+        return self.snapshot().version
+
+    def convert(self, money: Money, currency: str, rounding: str = DEFAULT_ROUNDING) -> Money:
+        if money.currency == currency:
+            return money
+        factor = self.snapshot().minor_factor(money.currency, currency)
+        return Money.from_minor(int((money.minor_units * factor).to_integral_value(rounding=rounding)), currency)
+
+    def total(self, lines: Iterable[tuple[Money, int]], currency: str,
+              rounding: str = DEFAULT_ROUNDING) -> Money:
+        # one pass: exact integer subtotal per currency, then one conversion per currency
+        subtotals: dict[str, int] = {}
+        for price, qty in lines:
+            subtotals[price.currency] = subtotals.get(price.currency, 0) + price.minor_units * qty
+        snap = self.snapshot()
+        minor = 0
+        for cur, sub in subtotals.items():
+            if cur == currency:
+                minor += sub
+            else:
+                minor += int((sub * snap.minor_factor(cur, currency)).to_integral_value(rounding=rounding))
+        return Money.from_minor(minor, currency)
+
+    def _same(self, loaded: tuple[str, dict[str, Decimal]]) -> bool:
+        base, rates = loaded
+        snap = self._snapshot
+        return base == snap.base and snap.rates == {**rates, base: Decimal(1)}
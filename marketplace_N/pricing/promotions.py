@@ -0,0 +1,180 @@
+from bisect import bisect_right, insort
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Any, Iterable, Optional, Sequence
+import heapq
+import uuid
+
+from listings.models import Listing
+from money import Money
+from pricing.calculators import IPriceCalculator
+
+_HUNDRED = Decimal(100)
+
+
+@dataclass(frozen=True)
+class PromotionRule:
+    id: str
+    percent_off: Decimal = Decimal(0)
+    # only applies to prices in the same currency
+    amount_off: Optional[Money] = None
+    # empty scope means "any"; categories are registry codes such as "electronics"
+    categories: frozenset[str] = frozenset()
+    sellers: frozenset[uuid.UUID] = frozenset()
+    loyalty_levels: frozenset[str] = frozenset()
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+    priority: int = 0
+    # an exclusive rule only applies when it is the first match, and then nothing stacks on it
+    exclusive: bool = False
+
+    def is_active(self, now: datetime) -> bool:
+        return (self.starts_at is None or self.starts_at <= now) and (self.ends_at is None or now < self.ends_at)
+
+@dataclass
+class _Bucket:
+    # rules sorted by start time so rules that haven't started yet are cut off by bisect
+    starts: list[datetime] = field(default_factory=list)
+    rules: list[PromotionRule] = field(default_factory=list)
+
+class PromotionEngine:
+    def __init__(self, rules: Iterable[PromotionRule] = ()):
+        # (category or None, seller or None) -> bucket
+        self._buckets: dict[tuple[Optional[str], Optional[uuid.UUID]], _Bucket] = {}
+        self._rules: dict[str, PromotionRule] = {}
+        # sorted start/end instants; the count before "now" identifies the active window
+        self._boundaries: list[datetime] = []
+        # (ends_at, rule id) min-heap, so rules that have ended are evicted without a scan
+        self._ends: list[tuple[datetime, str]] = []
+        self.version = 0
+        for r in rules:
+            self.add(r)
+
+    def add(self, rule: PromotionRule) -> None:
+        if rule.id in self._rules:
+            self.remove(rule.id)
+        self._rules[rule.id] = rule
+        start = rule.starts_at or datetime.min
+        for key in self._keys(rule):
+            bucket = self._buckets.setdefault(key, _Bucket())
+            pos = bisect_right(bucket.starts, start)
+            bucket.starts.insert(pos, start)
+            bucket.rules.insert(pos, rule)
+        for t in (rule.starts_at, rule.ends_at):
+            if t is not None:
+                insort(self._boundaries, t)
+        if rule.ends_at is not None:
+            heapq.heappush(self._ends, (rule.ends_at, rule.id))
+        self.version += 1
+
+    def remove(self, rule_id: str) -> None:
+        rule = self._rules.pop(rule_id, None)
+        if rule is None:
+            return
+        for key in self._keys(rule):
+            bucket = self._buckets[key]
+            i = bucket.rules.index(rule)
+            del bucket.starts[i]
+            del bucket.rules[i]
+            if not bucket.rules:
+                del self._buckets[key]
+        for t in (rule.starts_at, rule.ends_at):
+            if t is not None:
+                self._boundaries.remove(t)
+        self.version += 1
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        # drops rules whose end has passed; stale heap entries (removed or re-added rules) are skipped
+        now = now or datetime.utcnow()
+        pruned = 0
+        while self._ends and self._ends[0][0] <= now:
+            ends_at, rule_id = heapq.heappop(self._ends)
+            rule = self._rules.get(rule_id)
+            if rule is not None and rule.ends_at == ends_at:
+                self.remove(rule_id)
+                pruned += 1
+        return pruned
+
+    def applicable(self, listing: Listing, ctx: dict[str, Any]) -> list[PromotionRule]:
+        now = ctx.get("now") or datetime.utcnow()
+        if self._ends and self._ends[0][0] <= now:
+            self.prune(min(now, datetime.utcnow()))
+        loyalty = ctx.get("loyalty_level")
+        # listings created before the code was recorded fall back to their product type
+        category = listing.payload.get("category", listing.product_type)
+        found = []
+        for key in ((category, listing.seller_id), (category, None),
+                    (None, listing.seller_id), (None, None)):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            started = bisect_right(bucket.starts, now)
+            for rule in bucket.rules[:started]:
+                if (rule.ends_at is None or now < rule.ends_at) and \
+                        (not rule.loyalty_levels or loyalty in rule.loyalty_levels):
+                    found.append(rule)
+        # deterministic order: priority desc, then id
+        found.sort(key=lambda r: (-r.priority, r.id))
+        return found
+
+    def apply_minor(self, minor: int, currency: str, listing: Listing, ctx: dict[str, Any]) -> int:
+        applied = False
+        for rule in self.applicable(listing, ctx):
+            if rule.exclusive and applied:
+                continue
+            if rule.amount_off is not None and rule.amount_off.currency != currency:
+                # a fixed discount in another currency doesn't apply at all, percent part included
+                continue
+            if rule.percent_off:
+                factor = 1 - rule.percent_off / _HUNDRED
+                minor = int((Decimal(minor) * factor).to_integral_value(rounding=ROUND_HALF_EVEN))
+            if rule.amount_off is not None:
+                minor -= rule.amount_off.minor_units
+            applied = True
+            if rule.exclusive:
+                break
+        return max(minor, 0)
+
+    def window_key(self, ctx: dict[str, Any]) -> int:
+        now = ctx.get("now") or datetime.utcnow()
+        return bisect_right(self._boundaries, now)
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    @staticmethod
+    def _keys(rule: PromotionRule) -> list[tuple[Optional[str], Optional[uuid.UUID]]]:
+        categories = rule.categories or (None,)
+        sellers = rule.sellers or (None,)
+        return [(c, s) for c in categories for s in sellers]
+
+class PromotionStage:
+    needs_listings = True
+
+    def __init__(self, engine: PromotionEngine, ctx: dict[str, Any]):
+        self._engine = engine
+        # pin "now" so the whole batch is priced against one instant
+        self._ctx = {**ctx, "now": ctx.get("now") or datetime.utcnow()}
+
+    def apply_listings(self, minors: list[int], currencies: list[str],
+                       listings: Sequence[Listing]) -> list[int]:
+        apply = self._engine.apply_minor
+        return [apply(m, cur, l, self._ctx) for m, cur, l in zip(minors, currencies, listings)]
+
+class PromotionRulesDecorator(IPriceCalculator):
+    def __init__(self, next_calc: IPriceCalculator, engine: PromotionEngine):
+        self._next = next_calc
+        self._engine = engine
+
+    def calculate(self, listing: Listing, ctx: dict[str, Any]) -> Money:
+        base = self._next.calculate(listing, ctx)
+        return Money.from_minor(self._engine.apply_minor(base.minor_units, base.currency, listing, ctx),
+                                base.currency)
+
+    def quote_key(self, ctx: dict[str, Any]) -> tuple:
+        # the rule set only changes on edits or when some promotion starts/ends
+        return ("promotions", self._engine.version, self._engine.window_key(ctx), ctx.get("loyalty_level"))
+
+    def batch_stage(self, ctx: dict[str, Any]) -> PromotionStage:
+        return PromotionStage(self._engine, ctx)
@@ -0,0 +1,72 @@
+from typing import Any, Hashable, Optional
+import threading
+import uuid
+
+from listings.cache import CacheStats, LRUCache
+from listings.models import Listing
+from money import Money
+from pricing.calculators import IPriceCalculator
+
+
+class CachingPriceCalculator(IPriceCalculator):
+    def __init__(self, next_calc: IPriceCalculator, max_size: int = 100_000, ttl: Optional[float] = None):
+        self._next = next_calc
+        self._cache = LRUCache(max_size=max_size, ttl=ttl, on_evict=self._forget)
+        # listing id -> cached keys, so an update drops every quote of that listing
+        self._keys_by_listing: dict[uuid.UUID, set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def calculate(self, listing: Listing, ctx: dict[str, Any]) -> Money:
+        key = self._key(listing, ctx)
+        if key is None:
+            return self._next.calculate(listing, ctx)
+        cached, price = self._cache.lookup(key)
+        if cached:
+            return price
+        price = self._next.calculate(listing, ctx)
+        self._cache.put(key, price)
+        with self._lock:
+            self._keys_by_listing.setdefault(listing.id, set()).add(key)
+        return price
+
+    def invalidate(self, listing_id: uuid.UUID) -> None:
+        with self._lock:
+            keys = self._keys_by_listing.pop(listing_id, ())
+        for key in keys:
+            self._cache.pop(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        with self._lock:
+            self._keys_by_listing.clear()
+
+    def get_stats(self) -> CacheStats:
+        return self._cache.stats
+
+    def batch_stage(self, ctx: dict[str, Any]) -> None:
+        # batch repricing goes straight through the chain
+        return None
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _key(self, listing: Listing, ctx: dict[str, Any]) -> Optional[tuple]:
+        # each layer contributes its config plus the ctx values it reads, so unrelated
+        # ctx keys don't fragment the cache
+        parts = []
+        node = self._next
+        while node is not None:
+            quote_key = getattr(node, "quote_key", None)
+            if quote_key is None:
+                return None
+            parts.append(quote_key(ctx))
+            node = getattr(node, "_next", None)
+        return listing.id, listing.version, tuple(parts)
+
+    def _forget(self, key: Hashable) -> None:
+        with self._lock:
+            keys = self._keys_by_listing.get(key[0])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_listing[key[0]]
@@ -0,0 +1,119 @@
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+import heapq
+import math
+import re
+import uuid
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_TEXT_FIELDS = ("title",)
+# mapper keys that are not turned into facet postings
+_SKIP_FIELDS = ("id",) + _TEXT_FIELDS
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+@dataclass
+class SearchHit:
+    id: uuid.UUID
+    score: float
+
+@dataclass
+class SearchResult:
+    hits: list[SearchHit] = field(default_factory=list)
+    total: int = 0
+    facets: dict[str, dict[str, int]] = field(default_factory=dict)
+
+class SearchIndex:
+    def __init__(self):
+        # token -> {doc id: term frequency}
+        self._postings: dict[str, dict[uuid.UUID, int]] = defaultdict(dict)
+        # (field, value) -> {doc id}
+        self._facets: dict[tuple[str, str], dict[uuid.UUID, None]] = defaultdict(dict)
+        # doc id -> what it was indexed under, so removal touches only its own postings
+        self._doc_terms: dict[uuid.UUID, tuple[dict[str, int], tuple[tuple[str, str], ...]]] = {}
+
+    def add(self, id: uuid.UUID, doc: dict[str, Any]) -> None:
+        if id in self._doc_terms:
+            self.remove(id)
+        terms = Counter()
+        for f in _TEXT_FIELDS:
+            if doc.get(f):
+                terms.update(tokenize(str(doc[f])))
+        facets = tuple((k, str(v)) for k, v in doc.items() if k not in _SKIP_FIELDS and v is not None)
+        for token, tf in terms.items():
+            self._postings[token][id] = tf
+        for key in facets:
+            self._facets[key][id] = None
+        self._doc_terms[id] = (dict(terms), facets)
+
+    def remove(self, id: uuid.UUID) -> None:
+        entry = self._doc_terms.pop(id, None)
+        if entry is None:
+            return
+        terms, facets = entry
+        for token in terms:
+            self._discard(self._postings, token, id)
+        for key in facets:
+            self._discard(self._facets, key, id)
+
+    def search(self, text: str = "", filters: Optional[dict[str, str]] = None,
+               limit: int = 10, facet_fields: Optional[Iterable[str]] = None) -> SearchResult:
+        tokens = tokenize(text)
+        candidates = self._match_filters(filters or {})
+        if tokens:
+            scores = self._score(tokens, candidates)
+        else:
+            scores = dict.fromkeys(candidates if candidates is not None else self._doc_terms, 0.0)
+
+        ranked = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+        result = SearchResult(hits=[SearchHit(id, score) for id, score in ranked],
+                              total=len(scores))
+        wanted = set(facet_fields) if facet_fields is not None else None
+        counts: dict[str, Counter] = defaultdict(Counter)
+        for id in scores:
+            for f, v in self._doc_terms[id][1]:
+                if wanted is None or f in wanted:
+                    counts[f][v] += 1
+        result.facets = {f: dict(c) for f, c in counts.items()}
+        return result
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def _match_filters(self, filters: dict[str, str]) -> Optional[set[uuid.UUID]]:
+        if not filters:
+            return None
+        # intersect starting from the rarest facet
+        buckets = sorted((self._facets.get((f, str(v)), {}) for f, v in filters.items()), key=len)
+        matched = set(buckets[0])
+        for b in buckets[1:]:
+            matched.intersection_update(b)
+        return matched
+
+    def _score(self, tokens: list[str], candidates: Optional[set[uuid.UUID]]) -> dict[uuid.UUID, float]:
+        n = len(self._doc_terms)
+        scores: dict[uuid.UUID, float] = defaultdict(float)
+        for token in set(tokens):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + n / len(postings))
+            if candidates is not None and len(candidates) < len(postings):
+                matches = ((id, postings[id]) for id in candidates if id in postings)
+            else:
+                matches = ((id, tf) for id, tf in postings.items() if candidates is None or id in candidates)
+            for id, tf in matches:
+                scores[id] += (1 + math.log(tf)) * idf
+        return scores
+
+    @staticmethod
+    def _discard(index: dict, key, id: uuid.UUID) -> None:
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.pop(id, None)
+        if not bucket:
+            del index[key]